@@ -14,10 +14,9 @@ import threading
 import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
-import asyncio
 
 # Import translation modules
-from translate_and_fill_bubbles_multilang import process_comic_page_with_languages
+from translate_and_fill_bubbles_multilang import process_comic_page_with_languages, run_coroutine
 from translate_pdf_comic import translate_pdf_comic, images_to_pdf
 
 # Load environment variables
@@ -262,7 +261,7 @@ def process_translation(job_id, input_path, source_lang, target_lang):
             
             try:
                 # Process the comic with language parameters
-                asyncio.run(process_comic_page_with_languages(
+                run_coroutine(process_comic_page_with_languages(
                     input_path, 
                     output_path, 
                     api_key,
@@ -406,7 +405,7 @@ def download_original(job_id):
 
 def process_comic_page_multilang(image_path, output_path, api_key, source_lang="English", target_lang="Russian"):
     """Wrapper to call process_comic_page_with_languages with async support"""
-    asyncio.run(process_comic_page_with_languages(
+    run_coroutine(process_comic_page_with_languages(
         image_path, 
         output_path, 
         api_key,
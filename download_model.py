@@ -15,4 +15,18 @@ print(f"Model downloaded to: {model_path}")
 # Rename to match what the script expects
 if os.path.exists("weights/comic-speech-bubble-detector.pt"):
     shutil.move("weights/comic-speech-bubble-detector.pt", "weights/ogkalu_model.pt")
-    print("Model renamed to: weights/ogkalu_model.pt") 
\ No newline at end of file
+    print("Model renamed to: weights/ogkalu_model.pt")
+
+# Optionally export an accelerated copy of the detector, which the translator
+# picks up automatically: EXPORT_BUBBLE_MODEL=engine (TensorRT FP16, needs an
+# NVIDIA GPU) or EXPORT_BUBBLE_MODEL=onnx (for onnxruntime)
+export_format = os.getenv("EXPORT_BUBBLE_MODEL", "").lower()
+if export_format in ("engine", "onnx"):
+    from ultralytics import YOLO
+    print(f"Exporting speech bubble model to {export_format}...")
+    model = YOLO("weights/ogkalu_model.pt")
+    if export_format == "engine":
+        exported = model.export(format="engine", half=True, imgsz=640, device=0, dynamic=True, batch=8)
+    else:
+        exported = model.export(format="onnx", imgsz=640, dynamic=True)
+    print(f"Model exported to: {exported}")
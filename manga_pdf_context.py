@@ -3,7 +3,7 @@ import os
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY environment variable not set")
-from openai import OpenAI
+from openai import OpenAI, APIError, BadRequestError
 
 from PIL import Image
 import matplotlib.pyplot as plt
@@ -11,10 +11,47 @@ import base64
 
 
 import json
-from pdf2image import convert_from_path
+import fitz
 import io
+import hashlib
+import shelve
 from tqdm import tqdm
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Set
+# orjson writes the (large, non-ASCII) analysis much faster; fall back to the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Page analysis needs the full panel layout: send pages in high detail,
+# capped at 1280px on the long side (the API downsamples larger images anyway)
+PAGE_IMAGE_MAX_SIDE = 1280
+PAGE_IMAGE_DETAIL = "high"
+PAGE_IMAGE_JPEG_QUALITY = 85
+
+# Page analyses are cached on disk, keyed by the page pixels, the model and the
+# running story context, so re-processing the same comic skips the vision calls
+ANALYSIS_MODEL = "gpt-4o"
+PAGE_CACHE_PATH = os.getenv("PAGE_CONTEXT_CACHE_PATH", ".page_context_cache")
+
+# Consecutive pages sent together in one vision request; the running context
+# is then updated once per batch instead of once per page (1 disables batching)
+BATCH_PAGES = int(os.getenv("COMIC_BATCH_PAGES", "3"))
+
+# Rate limits, timeouts, connection errors and 5xx are retried by the SDK with
+# jittered exponential backoff (honouring Retry-After); 400/401 fail at once
+ANALYSIS_MAX_RETRIES = int(os.getenv("ANALYSIS_MAX_RETRIES", "4"))
+
+def iter_pdf_page_images(pdf_path: str, max_side: int = PAGE_IMAGE_MAX_SIDE):
+    """Render each PDF page straight to an RGB image at the size sent to the API"""
+    # One page at a time, in memory: no temp files, and no decoding the whole PDF up front
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            zoom = max_side / max(page.rect.width, page.rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+            yield Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
 
 class MangaAnalyzer:
     def __init__(self):
@@ -23,19 +60,62 @@ class MangaAnalyzer:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
 
-        self.client = OpenAI()
+        self.client = OpenAI(max_retries=ANALYSIS_MAX_RETRIES)
         self.characters = {}  # Store character information
         self.plot_points = []  # Store major plot points
         self.current_context = ""  # Maintain running context
+        self._page_cache = None  # Page analysis cache, opened on first use
         
     def encode_image_from_pil(self, pil_image):
         buffered = io.BytesIO()
-        pil_image.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        if max(pil_image.size) > PAGE_IMAGE_MAX_SIDE:
+            # Rendered pages are already at the API size; only copy the ones to shrink
+            pil_image = pil_image.copy()
+            pil_image.thumbnail((PAGE_IMAGE_MAX_SIDE, PAGE_IMAGE_MAX_SIDE))
+        if pil_image.mode != "RGB":
+            pil_image = pil_image.convert("RGB")
+        # JPEG matches the data URL's declared type and skips PNG's slow deflate pass
+        pil_image.save(buffered, format="JPEG", quality=PAGE_IMAGE_JPEG_QUALITY)
+        return base64.b64encode(buffered.getbuffer()).decode('ascii')
+
+    def page_cache(self):
+        # Kept open for the analyzer's lifetime instead of reopening the file twice per page
+        if self._page_cache is None:
+            self._page_cache = shelve.open(PAGE_CACHE_PATH)
+        return self._page_cache
+
+    def close_page_cache(self):
+        if self._page_cache is not None:
+            self._page_cache.close()
+            self._page_cache = None
+
+    def page_cache_key(self, *page_images) -> str:
+        # The analysis depends on the running context, so it is part of the key
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(ANALYSIS_MODEL.encode())
+        for page_image in page_images:
+            digest.update(f"{page_image.mode}:{page_image.size}".encode())
+            digest.update(page_image.tobytes())
+        digest.update(self.current_context.encode())
+        return digest.hexdigest()
+
+    def image_content(self, page_image) -> dict:
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{self.encode_image_from_pil(page_image)}",
+                "detail": PAGE_IMAGE_DETAIL,
+            },
+        }
 
     def analyze_page_with_context(self, page_image, page_num: int) -> dict:
-        base64_image = self.encode_image_from_pil(page_image)
-        
+        cache_key = self.page_cache_key(page_image)
+        cached = self.page_cache().get(cache_key)
+        if cached is not None:
+            # Replay the context update the original analysis produced
+            self.current_context = cached["context_after"]
+            return {**cached["analysis"], "page_number": page_num}
+
         # Create a context-aware prompt
         prompt = f"""This is page {page_num} of a manga. Based on the previous context:
 {self.current_context}
@@ -51,7 +131,7 @@ Provide the analysis in a structured way."""
 
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=ANALYSIS_MODEL,
                 messages=[
                     {
                         "role": "user",
@@ -60,12 +140,7 @@ Provide the analysis in a structured way."""
                                 "type": "text",
                                 "text": prompt,
                             },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                },
-                            },
+                            self.image_content(page_image),
                         ],
                     },
                 ],
@@ -73,51 +148,123 @@ Provide the analysis in a structured way."""
             
             # Get the initial analysis
             initial_analysis = response.choices[0].message.content
+            analysis = self.structure_page_analysis(initial_analysis, page_num)
 
-            # Now ask for structured data about characters and plot
-            structured_prompt = f"""Based on this analysis: {initial_analysis}
+            # Update the running context with new information
+            self.update_context(analysis["structured_analysis"])
+            
+            self.page_cache()[cache_key] = {"analysis": analysis, "context_after": self.current_context}
+            return analysis
+            
+        except Exception as e:
+            print(f"Error processing page {page_num}: {str(e)}")
+            return {
+                "page_number": page_num,
+                "error": str(e)
+            }
 
-Please provide a structured response in the following format:
-1. List any characters mentioned and their current state/actions
-2. Any new character relationships or developments
-3. Key plot points from this page
-4. How this connects to the previous context
+    def analyze_pages_with_context(self, page_images, first_page_num: int) -> List[dict]:
+        """Analyze consecutive pages with a single multi-image request"""
+        if len(page_images) == 1:
+            return [self.analyze_page_with_context(page_images[0], first_page_num)]
+        page_nums = range(first_page_num, first_page_num + len(page_images))
 
-Format the response to be easily parsed as structured data."""
+        cache_key = self.page_cache_key(*page_images)
+        cached = self.page_cache().get(cache_key)
+        if cached is not None:
+            self.current_context = cached["context_after"]
+            return [{**analysis, "page_number": page_num} for analysis, page_num in zip(cached["analyses"], page_nums)]
+
+        prompt = f"""These are pages {page_nums[0]} to {page_nums[-1]} of a manga, in reading order. Based on the previous context:
+{self.current_context}
+
+Analyze each page and provide:
+1. What's happening in this scene
+2. Any characters present (new or existing)
+3. Any important plot developments
+4. Any character relationships or development
+5. The emotional tone of the scene
+
+Respond with a JSON object {{"pages": [...]}} holding one structured analysis (a string) per page, in page order."""
 
-            structured_response = self.client.chat.completions.create(
-                model="gpt-4o",
+        try:
+            response = self.client.chat.completions.create(
+                model=ANALYSIS_MODEL,
                 messages=[
                     {
                         "role": "user",
-                        "content": structured_prompt,
+                        "content": [{"type": "text", "text": prompt}]
+                                   + [self.image_content(page_image) for page_image in page_images],
                     },
                 ],
+                response_format={"type": "json_object"},
             )
+            json_loads = orjson.loads if orjson is not None else json.loads
+            initial_analyses = json_loads(response.choices[0].message.content)["pages"]
+            if len(initial_analyses) != len(page_images):
+                raise ValueError(f"expected {len(page_images)} page analyses, got {len(initial_analyses)}")
+        except (BadRequestError, ValueError, KeyError, TypeError) as e:
+            # Too many images for the context window, or a malformed reply: go page by page
+            print(f"Batched analysis of pages {page_nums[0]}-{page_nums[-1]} failed ({e}), analyzing them one by one")
+            return [self.analyze_page_with_context(page_image, page_num)
+                    for page_image, page_num in zip(page_images, page_nums)]
+        except APIError as e:
+            # Still failing after the SDK's retries (rate limit, outage): record it, keep the book going
+            print(f"Error processing pages {page_nums[0]}-{page_nums[-1]}: {str(e)}")
+            return [{"page_number": page_num, "error": str(e)} for page_num in page_nums]
+
+        try:
+            # Structuring a page only needs its own analysis, so the pages' calls overlap
+            with ThreadPoolExecutor(max_workers=len(page_images)) as executor:
+                analyses = list(executor.map(self.structure_page_analysis, map(str, initial_analyses), page_nums))
+            self.update_context("\n\n".join(analysis["structured_analysis"] for analysis in analyses))
+            self.page_cache()[cache_key] = {"analyses": analyses, "context_after": self.current_context}
+            return analyses
 
-            # Update the running context with new information
-            self.update_context(structured_response.choices[0].message.content)
-            
-            return {
-                "page_number": page_num,
-                "raw_analysis": initial_analysis,
-                "structured_analysis": structured_response.choices[0].message.content,
-                "characters_present": self.extract_characters(structured_response.choices[0].message.content),
-                "plot_developments": self.extract_plot_points(structured_response.choices[0].message.content)
-            }
-            
         except Exception as e:
-            print(f"Error processing page {page_num}: {str(e)}")
+            print(f"Error processing pages {page_nums[0]}-{page_nums[-1]}: {str(e)}")
+            return [{"page_number": page_num, "error": str(e)} for page_num in page_nums]
+
+    def structure_page_analysis(self, initial_analysis: str, page_num: int) -> dict:
+        # Now ask for structured data about characters and plot
+        structured_prompt = f"""Based on this analysis: {initial_analysis}
+
+Please provide a structured response in the following format:
+1. List any characters mentioned and their current state/actions
+2. Any new character relationships or developments
+3. Key plot points from this page
+4. How this connects to the previous context
+
+Format the response to be easily parsed as structured data."""
+
+        structured_response = self.client.chat.completions.create(
+            model=ANALYSIS_MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": structured_prompt,
+                },
+            ],
+        )
+        structured_analysis = structured_response.choices[0].message.content
+
+        # Both extractions read the same structured analysis: run them side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            characters = executor.submit(self.extract_characters, structured_analysis)
+            plot_points = executor.submit(self.extract_plot_points, structured_analysis)
             return {
                 "page_number": page_num,
-                "error": str(e)
+                "raw_analysis": initial_analysis,
+                "structured_analysis": structured_analysis,
+                "characters_present": characters.result(),
+                "plot_developments": plot_points.result()
             }
 
     def update_context(self, new_analysis: str):
         # Keep a running summary of the last few important events
         # Limit context to prevent token overflow
         context_summary = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -126,14 +273,14 @@ Format the response to be easily parsed as structured data."""
             ]
         )
         
-        self.current_context = context_summary.completion_message.content.text
+        self.current_context = context_summary.choices[0].message.content
 
     def extract_characters(self, analysis: str) -> List[Dict]:
         # Extract character information from the analysis
         character_prompt = f"Based on this analysis: {analysis}\n\nList all characters mentioned and their current state/actions in a structured format."
         
         character_response = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -150,7 +297,7 @@ Format the response to be easily parsed as structured data."""
         plot_prompt = f"Based on this analysis: {analysis}\n\nList the key plot developments in bullet points."
         
         plot_response = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -163,11 +310,13 @@ Format the response to be easily parsed as structured data."""
 
     def analyze_manga_pdf(self, pdf_path: str, output_json_path: str):
         print("Converting PDF to images...")
-        pages = convert_from_path(pdf_path)
+        with fitz.open(pdf_path) as doc:
+            total_pages = len(doc)
+        pages = iter_pdf_page_images(pdf_path)
         
         manga_analysis = {
             "title": os.path.basename(pdf_path),
-            "total_pages": len(pages),
+            "total_pages": total_pages,
             "pages": [],
             "characters": {},
             "plot_summary": [],
@@ -175,14 +324,22 @@ Format the response to be easily parsed as structured data."""
             "story_arcs": []
         }
         
-        print("Analyzing pages...")
-        for page_num, page in enumerate(tqdm(pages), 1):
-            page_analysis = self.analyze_page_with_context(page, page_num)
-            manga_analysis["pages"].append(page_analysis)
-            
-            # Every 10 pages (or at the end), generate a summary
-            if page_num % 10 == 0 or page_num == len(pages):
-                summary_prompt = f"""Based on the current context:
+        # The page cache is closed (and flushed) even when an API or JSON error aborts the run
+        try:
+            print("Analyzing pages...")
+            batch_size = max(1, BATCH_PAGES)
+            progress = tqdm(total=total_pages)
+            # Last page covered by a story-arc summary; batches don't end on multiples of 10
+            last_summarized = 0
+            for start in range(0, total_pages, batch_size):
+                batch = list(islice(pages, batch_size))
+                manga_analysis["pages"].extend(self.analyze_pages_with_context(batch, start + 1))
+                progress.update(len(batch))
+                page_num = start + len(batch)
+                
+                # Every 10 pages (or at the end), generate a summary
+                if page_num // 10 > start // 10 or page_num == total_pages:
+                    summary_prompt = f"""Based on the current context:
 {self.current_context}
 
 Provide:
@@ -191,28 +348,38 @@ Provide:
 3. Major plot developments so far
 4. Predictions or open plot threads"""
 
-                summary = self.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": summary_prompt
-                        }
-                    ]
-                )
-                
-                manga_analysis["story_arcs"].append({
-                    "pages": f"{max(1, page_num-9)}-{page_num}",
-                    "summary": summary.completion_message.content.text
-                })
-        
-        # Generate final comprehensive analysis
-        final_analysis = self.generate_final_analysis(manga_analysis)
-        manga_analysis.update(final_analysis)
-        
-        print(f"Saving results to {output_json_path}")
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(manga_analysis, f, indent=2, ensure_ascii=False)
+                    summary = self.client.chat.completions.create(
+                        model=ANALYSIS_MODEL,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": summary_prompt
+                            }
+                        ]
+                    )
+                    
+                    manga_analysis["story_arcs"].append({
+                        "pages": f"{last_summarized + 1}-{page_num}",
+                        "summary": summary.choices[0].message.content
+                    })
+                    last_summarized = page_num
+            
+            progress.close()
+            
+            # Generate final comprehensive analysis
+            final_analysis = self.generate_final_analysis(manga_analysis)
+            manga_analysis.update(final_analysis)
+            
+            print(f"Saving results to {output_json_path}")
+            if orjson is not None:
+                # Same layout (2-space indent, raw UTF-8) at a fraction of the cost
+                with open(output_json_path, 'wb') as f:
+                    f.write(orjson.dumps(manga_analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(output_json_path, 'w', encoding='utf-8') as f:
+                    json.dump(manga_analysis, f, indent=2, ensure_ascii=False)
+        finally:
+            self.close_page_cache()
         
         print("Analysis complete!")
 
@@ -228,7 +395,7 @@ Provide a comprehensive analysis including:
 5. Significant plot twists or revelations"""
 
         final_response = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -247,7 +414,7 @@ Provide a comprehensive analysis including:
         theme_prompt = f"Based on this analysis: {analysis}\n\nList the main themes and motifs of the story."
         
         theme_response = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -262,7 +429,7 @@ Provide a comprehensive analysis including:
         arc_prompt = f"Based on this analysis: {analysis}\n\nDescribe the development arc for each main character."
         
         arc_response = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "user",
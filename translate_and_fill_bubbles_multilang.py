@@ -9,91 +9,377 @@ os.environ['QT_QPA_PLATFORM'] = 'offscreen'
 os.environ['DISPLAY'] = ''
 
 import time
+import random
+import threading
+import weakref
+from functools import lru_cache
+from collections import OrderedDict
 import base64
+import hashlib
+import json
 import asyncio
-import uuid
+import io
 from typing import List, Dict, Tuple
 from PIL import Image, ImageDraw, ImageFont
 import cv2
 import numpy as np
-from openai import OpenAI, AsyncOpenAI
+from openai import (
+    OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient,
+    RateLimitError, APIConnectionError, APITimeoutError, InternalServerError,
+)
+import httpx
 from dotenv import load_dotenv
-import textwrap
-from translation_context import TranslationContext
+from translation_cache import get_translation_cache
+# orjson decodes the batched JSON responses in C; fall back to the stdlib parser
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 import logging
 logger = logging.getLogger('comic_translator')
 # Load environment variables
 load_dotenv()
 
-def load_speech_bubble_model():
-    """Load the finetuned YOLOv8 model for speech bubble detection"""
+# Model used for translations; part of the translation cache key
+TRANSLATION_MODEL = "gpt-4o"
+
+# Vision budgets per task: (max image side in px, OpenAI image "detail" level).
+# Bubble OCR only needs legible glyphs, so small crops are sent in low detail.
+# Full-page analysis (manga_pdf_context.py) keeps high detail for the layout.
+IMAGE_BUDGETS = {
+    'bubble_ocr': (512, 'low'),
+}
+
+def _budget_crop(img, box, task):
+    """Crop box out of a PIL image, downscaled to fit the task's budget.
+
+    Cropping and the area-averaging downscale happen in one resize call, so
+    the full-resolution crop is never materialized.
+    """
+    max_side, _ = IMAGE_BUDGETS[task]
+    x, y, x2, y2 = box
+    width, height = x2 - x, y2 - y
+    scale = max_side / max(width, height, 1)
+    if scale >= 1:
+        return img.crop(box)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return img.resize(size, Image.Resampling.BOX, box=box)
+
+# One client per event loop: httpx connections are bound to the loop that opened
+# them. Keyed weakly, so a loop's client (and its pooled connections) goes away
+# with the loop instead of being replaced, unclosed, by the next loop's client
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+def get_async_client():
+    """Return the running loop's shared AsyncOpenAI client, backed by a pooled HTTP/2 connection"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            # Retries are handled by create_chat_completion, outside the concurrency limit
+            client = _async_clients[loop] = AsyncOpenAI(max_retries=0, http_client=DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            ))
+    return client
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+def run_coroutine(coro):
+    """Run a coroutine to completion on a long-lived background event loop.
+
+    asyncio.run creates and tears down a loop per call, and with it the pooled
+    client and its HTTP/2 connections; keeping one loop lets them survive
+    across pages and web jobs. Safe to call from any thread except the loop's own.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="comic-translator-io", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop).result()
+
+# Output cap per bubble for OCR and translation answers. Bubbles are short, so
+# this never truncates real text; it bounds the tail latency of a degenerate,
+# runaway generation, which a whole page would otherwise wait on
+MAX_TOKENS_PER_BUBBLE = 300
+
+# Single-bubble OCR instructions, shared by the sync and async readers so both
+# send the exact same prefix
+BUBBLE_OCR_PROMPT = """Extract ONLY the text content from this speech bubble.
+    Return just the text, nothing else. If there's no text, return 'EMPTY'.
+    Do not include any explanations or additional information."""
+
+# Upper bound on in-flight OpenAI requests; bursts beyond it only trigger 429 storms
+MAX_CONCURRENT_REQUESTS = int(os.getenv("OPENAI_MAX_CONCURRENCY", "10"))
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+# Retry backoff: a random delay within an exponentially growing, capped window
+# ("full jitter"), so concurrent pages hit by the same 429 burst don't retry in lockstep
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10.0
+
+_request_semaphores = weakref.WeakKeyDictionary()
+
+def _get_request_semaphore():
+    """Return the request semaphore of the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _request_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _request_semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return semaphore
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying: the server's Retry-After when it sent one, else full jitter"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        headers = response.headers
+        try:
+            if 'retry-after-ms' in headers:
+                return float(headers['retry-after-ms']) / 1000
+            if 'retry-after' in headers:
+                return float(headers['retry-after'])
+        except ValueError:
+            pass  # HTTP-date form; fall back to our own backoff
+    return RETRY_BASE_DELAY + random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+async def create_chat_completion(client, max_attempts=5, **kwargs):
+    """Create a chat completion with bounded concurrency and jittered exponential backoff.
+
+    Only rate-limit, connection, timeout and 5xx errors are retried; the
+    semaphore is released while waiting so other requests can proceed.
+    """
+    for attempt in range(max_attempts):
+        try:
+            async with _get_request_semaphore():
+                return await client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_attempts - 1:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(f"OpenAI request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+_bubble_model = None
+# Weights file the shared model was loaded from (engine, onnx or pt); part of the detection cache key
+_bubble_model_path_loaded = None
+_bubble_model_lock = threading.Lock()
+# Ultralytics predictors keep per-call state, so concurrent jobs take turns on the shared model
+_bubble_inference_lock = threading.Lock()
+
+BUBBLE_MODEL_WEIGHTS = 'weights/ogkalu_model.pt'
+
+@lru_cache(maxsize=1)
+def _cuda_available():
+    """Whether YOLO inference can run on a CUDA device"""
     try:
-        from ultralytics import YOLO
-        model = YOLO('weights/ogkalu_model.pt')
-        print("✅ Successfully loaded speech bubble detection model")
-        return model
-    except Exception as e:
-        print(f"❌ Error loading model: {e}")
-        return None
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+def _bubble_model_path():
+    """Prefer an exported TensorRT engine (CUDA) or ONNX model over the PyTorch weights.
+
+    Exports are produced by download_model.py (EXPORT_BUBBLE_MODEL=engine|onnx)
+    and sit next to the .pt file.
+    """
+    base, _ = os.path.splitext(BUBBLE_MODEL_WEIGHTS)
+    candidates = []
+    if _cuda_available():
+        candidates.append(base + '.engine')
+    try:
+        import onnxruntime  # noqa: F401
+        candidates.append(base + '.onnx')
+    except ImportError:
+        pass
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return BUBBLE_MODEL_WEIGHTS
+
+def load_speech_bubble_model():
+    """Load the finetuned YOLOv8 model for speech bubble detection.
+
+    The model is loaded once per process and shared by every page and job;
+    a failed load is retried on the next call.
+    """
+    global _bubble_model, _bubble_model_path_loaded
+    with _bubble_model_lock:
+        if _bubble_model is None:
+            try:
+                from ultralytics import YOLO
+                model_path = _bubble_model_path()
+                _bubble_model = YOLO(model_path, task='detect')
+                _bubble_model_path_loaded = model_path
+                print(f"✅ Successfully loaded speech bubble detection model ({os.path.basename(model_path)})")
+            except Exception as e:
+                print(f"❌ Error loading model: {e}")
+        return _bubble_model
+
+# Inference size for the bubble detector (the size it was trained at); pinning it
+# keeps input tensors a fixed shape so kernels are reused from page to page
+YOLO_IMGSZ = int(os.getenv("YOLO_IMGSZ", "640"))
+
+def _yolo_inference_kwargs():
+    """Inference options for the bubble detector: FP16 on CUDA, FP32 elsewhere"""
+    kwargs = {'imgsz': YOLO_IMGSZ, 'verbose': False}
+    if _cuda_available():
+        kwargs.update(device=0, half=True)
+    return kwargs
+
+# Detection confidence used by the translation pipeline
+BUBBLE_CONF_THRESHOLD = 0.3
+
+# Pages per YOLO forward pass when detecting bubbles on several pages at once
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
+
+# Detections of recently seen pages, keyed by their pixels: re-uploaded images
+# and pages repeated across a volume skip the YOLO pass
+DETECTION_CACHE_SIZE = 256
+_detection_cache = OrderedDict()
+_detection_cache_lock = threading.Lock()
+
+def _detection_cache_key(image, conf_threshold):
+    """Content key of a page (path or PIL image) for the detection cache"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{_bubble_model_path_loaded}:{YOLO_IMGSZ}:{conf_threshold}".encode())
+    if isinstance(image, Image.Image):
+        digest.update(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+    else:
+        with open(image, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def detect_speech_bubbles_batch(model, images, conf_threshold=0.5):
+    """Detect speech bubbles on several pages with batched YOLO inference.
+
+    images are paths or already decoded PIL images. Returns one list of
+    bubbles per image, in input order, each in reading order.
+    """
+    images = list(images)
+    if not images:
+        return []
+
+    keys = [_detection_cache_key(image, conf_threshold) for image in images]
+    detections = [None] * len(images)
+    with _detection_cache_lock:
+        for i, key in enumerate(keys):
+            if key in _detection_cache:
+                _detection_cache.move_to_end(key)
+                detections[i] = _detection_cache[key]
+    misses = [i for i, bubbles in enumerate(detections) if bubbles is None]
+
+    if misses:
+        with _bubble_inference_lock:
+            # stream=True hands results back batch by batch instead of keeping every page in memory
+            results = model([images[i] for i in misses], conf=conf_threshold, batch=YOLO_BATCH_SIZE, stream=True,
+                            **_yolo_inference_kwargs())
+            found = [_bubbles_from_result(result) for result in results]
+        found += [[] for _ in range(len(misses) - len(found))]
+
+        with _detection_cache_lock:
+            for i, bubbles in zip(misses, found):
+                detections[i] = _detection_cache[keys[i]] = bubbles
+            while len(_detection_cache) > DETECTION_CACHE_SIZE:
+                _detection_cache.popitem(last=False)
+
+    # Callers annotate the bubble dicts (text, translation), so hand out copies
+    return [[dict(bubble) for bubble in bubbles] for bubbles in detections]
+
+def detect_speech_bubbles(model, image, conf_threshold=0.5):
+    """Detect speech bubbles in an image (path or decoded PIL image) using the loaded model.
+
+    Bubbles are returned in reading order (top to bottom, left to right).
+    """
+    return detect_speech_bubbles_batch(model, [image], conf_threshold)[0]
+
+def _bubbles_from_result(result):
+    """Convert one YOLO result into bubble dicts in reading order"""
+    # Pull whole box/confidence tensors off the device once instead of per box
+    boxes = result.boxes
+    if boxes is None or not len(boxes):
+        print("🔍 Detected 0 speech bubbles")
+        return []
+
+    xyxy = boxes.xyxy.cpu().numpy()
+    confs = boxes.conf.cpu().numpy()
+
+    # Sort by position for better context flow (y first, then x), reordering the
+    # stacked box array once instead of every derived column
+    order = np.lexsort((xyxy[:, 0].astype(int), xyxy[:, 1].astype(int)))
+    xyxy = xyxy[order]
+    confs = confs[order]
+
+    # Geometry as parallel arrays, computed in one vectorized pass
+    xs = xyxy[:, 0].astype(int)
+    ys = xyxy[:, 1].astype(int)
+    widths = (xyxy[:, 2] - xyxy[:, 0]).astype(int)
+    heights = (xyxy[:, 3] - xyxy[:, 1]).astype(int)
+    center_xs = ((xyxy[:, 0] + xyxy[:, 2]) / 2).astype(int)
+    center_ys = ((xyxy[:, 1] + xyxy[:, 3]) / 2).astype(int)
+
+    # Dicts are only built at the boundary, for the OCR/translation/draw code
+    bubble_data = [
+        {
+            'bubble_id': i + 1,
+            'x': x,
+            'y': y,
+            'width': w,
+            'height': h,
+            'confidence': conf,
+            'center_x': cx,
+            'center_y': cy
+        }
+        for i, x, y, w, h, conf, cx, cy in zip(
+            order.tolist(), xs.tolist(), ys.tolist(),
+            widths.tolist(), heights.tolist(), confs.tolist(),
+            center_xs.tolist(), center_ys.tolist()
+        )
+    ]
 
-def detect_speech_bubbles(model, image_path, conf_threshold=0.5):
-    """Detect speech bubbles in an image using the loaded model"""
-    results = model(image_path, conf=conf_threshold)
-    
-    bubble_data = []
-    
-    for result in results:
-        boxes = result.boxes
-        if boxes is not None:
-            for i, box in enumerate(boxes):
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = box.conf[0].cpu().numpy()
-                
-                bubble_info = {
-                    'bubble_id': i + 1,
-                    'x': int(x1),
-                    'y': int(y1),
-                    'width': int(x2 - x1),
-                    'height': int(y2 - y1),
-                    'confidence': float(confidence),
-                    'center_x': int((x1 + x2) / 2),
-                    'center_y': int((y1 + y2) / 2)
-                }
-                bubble_data.append(bubble_info)
-    
     print(f"🔍 Detected {len(bubble_data)} speech bubbles")
     return bubble_data
 
-def encode_image(image_path):
-    """Encode image to base64 for OpenAI API"""
-    with open(image_path, "rb") as img:
-        return base64.b64encode(img.read()).decode('utf-8')
+def load_page_image(image):
+    """Decode a page once; only keep an alpha channel when the source actually has one.
 
-def crop_bubble_region(image_path, bubble_info, padding=10, job_id=None):
-    """Crop the bubble region from the image with some padding"""
-    img = cv2.imread(image_path)
+    image is a path, encoded image bytes, or an already open PIL image.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    img = image if isinstance(image, Image.Image) else Image.open(image)
+    has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+    mode = "RGBA" if has_alpha else "RGB"
+    if img.mode == mode:
+        # convert() to the same mode is a full copy; decode in place instead
+        img.load()
+        return img
+    return img.convert(mode)
 
+def crop_bubble_b64(page_img, bubble_info, padding=10, jpeg_quality=80):
+    """Crop the bubble region (with some padding) from a decoded page and return it as a base64 JPEG"""
     x = max(0, bubble_info['x'] - padding)
     y = max(0, bubble_info['y'] - padding)
-    x2 = min(img.shape[1], bubble_info['x'] + bubble_info['width'] + padding)
-    y2 = min(img.shape[0], bubble_info['y'] + bubble_info['height'] + padding)
+    x2 = min(page_img.width, bubble_info['x'] + bubble_info['width'] + padding)
+    y2 = min(page_img.height, bubble_info['y'] + bubble_info['height'] + padding)
 
-    cropped = img[y:y2, x:x2]
+    cropped = _budget_crop(page_img, (x, y, x2, y2), 'bubble_ocr')
+    if cropped.mode != 'RGB':
+        cropped = cropped.convert('RGB')
 
-    # Save temporary cropped image with unique prefix to avoid collisions
-    prefix = job_id or uuid.uuid4().hex[:8]
-    temp_path = f"temp_bubble_{prefix}_{bubble_info['bubble_id']}.png"
-    cv2.imwrite(temp_path, cropped)
+    # Encode in memory instead of writing and re-reading a temporary file
+    buffer = io.BytesIO()
+    cropped.save(buffer, format='JPEG', quality=jpeg_quality)
+    # getbuffer() exposes the encoded bytes without copying them out of the BytesIO
+    return base64.b64encode(buffer.getbuffer()).decode('ascii')
 
-    return temp_path
-
-def extract_text_from_bubble(client, bubble_image_path, bubble_info):
+def extract_text_from_bubble(client, base64_image, bubble_info):
     """Extract text from a single bubble using OpenAI's vision capabilities"""
-    base64_image = encode_image(bubble_image_path)
-
-    prompt = """Extract ONLY the text content from this speech bubble.
-    Return just the text, nothing else. If there's no text, return 'EMPTY'.
-    Do not include any explanations or additional information."""
 
     try:
         response = client.chat.completions.create(
@@ -104,38 +390,29 @@ def extract_text_from_bubble(client, bubble_image_path, bubble_info):
                     "content": [
                         {
                             "type": "text",
-                            "text": prompt,
+                            "text": BUBBLE_OCR_PROMPT,
                         },
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": f"data:image/jpeg;base64,{base64_image}",
+                                "detail": IMAGE_BUDGETS['bubble_ocr'][1],
                             },
                         },
                     ],
                 },
             ],
+            max_tokens=MAX_TOKENS_PER_BUBBLE,
         )
 
         extracted_text = response.choices[0].message.content.strip()
-
-        # Clean up temporary file
-        os.remove(bubble_image_path)
-
         return extracted_text
     except Exception as e:
         print(f"Error extracting text from bubble {bubble_info['bubble_id']}: {e}")
-        if os.path.exists(bubble_image_path):
-            os.remove(bubble_image_path)
         return "ERROR"
 
 
-async def extract_text_from_bubble_async(client: AsyncOpenAI, bubble_image: os.PathLike, bubble: dict):
-    base64_image = encode_image(bubble_image)
-
-    prompt = """Extract ONLY the text content from this speech bubble.
-    Return just the text, nothing else. If there's no text, return 'EMPTY'.
-    Do not include any explanations or additional information."""
+async def extract_text_from_bubble_async(client: AsyncOpenAI, base64_image: str, bubble: dict):
 
     messages = [
         {
@@ -147,12 +424,13 @@ async def extract_text_from_bubble_async(client: AsyncOpenAI, bubble_image: os.P
             "content": [
                 {
                     "type": "text",
-                    "text": prompt,
+                    "text": BUBBLE_OCR_PROMPT,
                 },
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/jpeg;base64,{base64_image}"
+                        "url": f"data:image/jpeg;base64,{base64_image}",
+                        "detail": IMAGE_BUDGETS['bubble_ocr'][1],
                     }
                 }
             ]
@@ -160,112 +438,367 @@ async def extract_text_from_bubble_async(client: AsyncOpenAI, bubble_image: os.P
     ]
 
     try:
-        response = await client.chat.completions.create(
+        response = await create_chat_completion(
+            client,
             model="gpt-4o",
             messages=messages,
+            max_tokens=MAX_TOKENS_PER_BUBBLE,
         )
         extracted_text = response.choices[0].message.content.strip()
-        # Clean up temporary file
-        os.remove(bubble_image)
-
         return extracted_text
     except Exception as e:
         print(f"Error extracting text from bubble {bubble['bubble_id']}: {e}")
-        if os.path.exists(bubble_image):
-            os.remove(bubble_image)
         return "ERROR"
 
 
-def translate_text(client, text, context_manager=None, bubble_id=None, source_lang="English", target_lang="Russian", debug=False):
-    """Translate text using OpenAI with context awareness"""
-    if text in ["EMPTY", "ERROR"]:
-        return text
+async def extract_texts_from_bubbles_async(client: AsyncOpenAI, bubble_images: List[str], bubbles: List[dict]):
+    """Extract text from several bubbles with a single multi-image request.
+
+    Falls back to one request per bubble if the batched call fails or its
+    answer can't be matched back to the bubbles (e.g. token-limit errors).
+    """
+    if len(bubble_images) == 1:
+        return [await extract_text_from_bubble_async(client, bubble_images[0], bubbles[0])]
+
+    prompt = f"""Extract ONLY the text content from each of the {len(bubble_images)} speech bubble images below.
+    Return a JSON object of the form {{"texts": [...]}} with exactly {len(bubble_images)} strings,
+    one per image, in the same order as the images. If a bubble has no text, use 'EMPTY' for it.
+    Do not include any explanations or additional information."""
 
-    # Build context-aware prompt
-    prompt_parts = []
+    content = [{"type": "text", "text": prompt}]
+    for i, bubble_image in enumerate(bubble_images, start=1):
+        content.append({"type": "text", "text": f"Image {i}:"})
+        content.append({
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{bubble_image}",
+                "detail": IMAGE_BUDGETS['bubble_ocr'][1],
+            }
+        })
+
+    try:
+        response = await create_chat_completion(
+            client,
+            model="gpt-4o",
+            messages=[{"role": "user", "content": content}],
+            response_format={"type": "json_object"},
+            max_tokens=MAX_TOKENS_PER_BUBBLE * len(bubble_images),
+        )
+        texts = json_loads(response.choices[0].message.content)["texts"]
+        if len(texts) != len(bubble_images) or not all(isinstance(t, str) for t in texts):
+            raise ValueError(f"expected {len(bubble_images)} texts, got {texts!r}")
+    except Exception as e:
+        ids = [b['bubble_id'] for b in bubbles]
+        print(f"Batched extraction failed for bubbles {ids}, falling back to per-bubble calls: {e}")
+        return await asyncio.gather(*(
+            extract_text_from_bubble_async(client, bubble_image, bubble)
+            for bubble_image, bubble in zip(bubble_images, bubbles)
+        ))
+
+    return [t.strip() or "EMPTY" for t in texts]
+
+
+async def extract_cached_texts_async(client, bubble_images: List[str], bubbles):
+    """Read a batch of bubble crops, only sending crops not already in the OCR cache"""
+    cache = get_translation_cache()
+    if cache is None or not bubble_images:
+        return await extract_texts_from_bubbles_async(client, bubble_images, bubbles)
+
+    texts = cache.get_ocr_many(bubble_images)
+    misses = [i for i, text in enumerate(texts) if text is None]
+    if misses:
+        read = await extract_texts_from_bubbles_async(
+            client, [bubble_images[i] for i in misses], [bubbles[i] for i in misses]
+        )
+        for i, text in zip(misses, read):
+            texts[i] = text
+        # Failed reads are retried next time rather than cached
+        fresh = [(bubble_images[i], text) for i, text in zip(misses, read) if text != "ERROR"]
+        if fresh:
+            cache.put_ocr_many(*zip(*fresh))
+    return texts
+
+async def extract_page_texts_async(client, page_img, bubble_data, batch_size=8, num_workers=4, queue_size=4, on_batch=None):
+    """Extract text from all bubbles of a page with a crop -> OCR producer/consumer pipeline.
+
+    Crops are produced in a worker thread and handed over in batches of up to
+    batch_size through a bounded queue; each batch is read with one multi-image
+    request, so the first batch is already in flight while later bubbles are
+    still being cropped. Results keep the order of bubble_data.
+
+    on_batch(start, texts) is called as soon as each batch is read, so a
+    downstream stage (translation) can start before the whole page is done.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    results = [None] * len(bubble_data)
+
+    async def crop_producer():
+        for start in range(0, len(bubble_data), batch_size):
+            batch = bubble_data[start:start + batch_size]
+            bubble_images = await asyncio.to_thread(lambda: [crop_bubble_b64(page_img, bubble) for bubble in batch])
+            await queue.put((start, batch, bubble_images))
+        # One sentinel per worker to shut the pipeline down
+        for _ in range(num_workers):
+            await queue.put(None)
+
+    async def ocr_worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            start, batch, bubble_images = item
+            texts = await extract_cached_texts_async(client, bubble_images, batch)
+            results[start:start + len(texts)] = texts
+            if on_batch:
+                on_batch(start, texts)
+
+    await asyncio.gather(crop_producer(), *(ocr_worker() for _ in range(num_workers)))
+    return results
+
+def build_translation_system_prompt(context_manager=None, source_lang="English", target_lang="Russian"):
+    """Build the system prompt shared by every bubble translation on a page.
+
+    Instructions and dialogue context are identical for all bubbles of a page,
+    so they are sent as one invariant prefix the API can prompt-cache instead
+    of being re-prefilled inside every per-bubble user message.
+    """
+    prompt_parts = [f"""You are translating a comic book to {target_lang}.
+    The user indicated the source language is {source_lang}, but detect the actual language of the text.
+    If the text is in a different language than {source_lang}, translate from the detected language instead.
+    Consider the context and maintain consistency with character names and tone.
+    Keep the translation natural and appropriate for comic book dialogue."""]
 
     # Add context if available
     if context_manager:
         context_prompt = context_manager.get_context_prompt(max_previous_bubbles=8)
         if context_prompt:
-            prompt_parts.append("You are translating a comic book. Here's the context so far:")
-            prompt_parts.append(context_prompt)
             prompt_parts.append("\n" + "="*50 + "\n")
+            prompt_parts.append("Here's the context so far:")
+            prompt_parts.append(context_prompt)
 
-    prompt_parts.append(f"""Now translate the following text to {target_lang}.
-    The user indicated the source language is {source_lang}, but detect the actual language of the text.
-    If the text is in a different language than {source_lang}, translate from the detected language instead.
-    Consider the context and maintain consistency with character names and tone.
-    Return ONLY the translated text, nothing else.
-    Keep the translation natural and appropriate for comic book dialogue.
+    return "\n".join(prompt_parts)
+
+def _prompt_cache_body(system_prompt):
+    """Request extras routing calls that share a system prompt to the same prompt cache.
+
+    OpenAI only reuses a cached prefix on the server that computed it; a key
+    derived from the prefix keeps a page's (and a job's) requests together.
+    Sent through extra_body so older SDKs without prompt_cache_key still work.
+    """
+    return {"prompt_cache_key": hashlib.blake2b(system_prompt.encode('utf-8'), digest_size=8).hexdigest()}
+
+def _build_translation_messages(text, system_prompt):
+    return [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": f"Return ONLY the translated text, nothing else.\n\nText to translate: {text}",
+        },
+    ]
+
+def _log_prompt_usage(response, bubble_id=None):
+    """Log prompt/cached token counts to check that the shared prefix is reused"""
+    usage = getattr(response, 'usage', None)
+    if not usage:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = getattr(details, 'cached_tokens', 0) if details else 0
+    logger.info(f"Bubble {bubble_id}: {usage.prompt_tokens} prompt tokens ({cached} cached)")
+
+def translate_text(client, text, context_manager=None, bubble_id=None, source_lang="English", target_lang="Russian", debug=False, use_cache=True, system_prompt=None, previous_text=None):
+    """Translate text using OpenAI with context awareness"""
+    if text in ["EMPTY", "ERROR"]:
+        return text
 
-    Text to translate: {text}""")
+    # Exact repeats (after the same previous_text line) are served from the
+    # persistent cache; pass use_cache=False to always ask the model
+    cache = get_translation_cache() if use_cache else None
+    if cache:
+        cached = cache.get(text, source_lang, target_lang, model=TRANSLATION_MODEL, context=previous_text)
+        if cached is not None:
+            return cached
 
-    prompt = "\n".join(prompt_parts)
+    if system_prompt is None:
+        system_prompt = build_translation_system_prompt(context_manager, source_lang, target_lang)
 
     try:
         response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            model=TRANSLATION_MODEL,
+            messages=_build_translation_messages(text, system_prompt),
+            max_tokens=MAX_TOKENS_PER_BUBBLE,
+            extra_body=_prompt_cache_body(system_prompt),
         )
+        if debug:
+            _log_prompt_usage(response, bubble_id)
 
         translated = response.choices[0].message.content.strip()
+        if cache:
+            cache.put(text, source_lang, target_lang, translated, model=TRANSLATION_MODEL, context=previous_text)
         return translated
     except Exception as e:
         if debug:
             print(f"Error translating text: {e}")
         return text
 
-async def translate_text_async(client, text, context_manager=None, bubble_id=None, source_lang="English", target_lang="Russian", debug=False):
-    """Translate text using OpenAI with context awareness"""
+async def translate_text_async(client, text, context_manager=None, bubble_id=None, source_lang="English", target_lang="Russian", debug=False, use_cache=True, system_prompt=None, previous_text=None, failed=None):
+    """Translate text using OpenAI with context awareness.
+
+    On an API error the text is returned untranslated and, when given, added to the failed set.
+    """
     if text in ["EMPTY", "ERROR"]:
         return text
 
-    # Build context-aware prompt
-    prompt_parts = []
+    # Exact repeats (after the same previous_text line) are served from the
+    # persistent cache; pass use_cache=False to always ask the model
+    cache = get_translation_cache() if use_cache else None
+    if cache:
+        cached = cache.get(text, source_lang, target_lang, model=TRANSLATION_MODEL, context=previous_text)
+        if cached is not None:
+            return cached
 
-    # Add context if available
-    if context_manager:
-        context_prompt = context_manager.get_context_prompt(max_previous_bubbles=8)
-        if context_prompt:
-            prompt_parts.append("You are translating a comic book. Here's the context so far:")
-            prompt_parts.append(context_prompt)
-            prompt_parts.append("\n" + "="*50 + "\n")
+    if system_prompt is None:
+        system_prompt = build_translation_system_prompt(context_manager, source_lang, target_lang)
 
-    prompt_parts.append(f"""Now translate the following text to {target_lang}.
-    The user indicated the source language is {source_lang}, but detect the actual language of the text.
-    If the text is in a different language than {source_lang}, translate from the detected language instead.
-    Consider the context and maintain consistency with character names and tone.
-    Return ONLY the translated text, nothing else.
-    Keep the translation natural and appropriate for comic book dialogue.
+    try:
+        response = await create_chat_completion(
+            client,
+            model=TRANSLATION_MODEL,
+            messages=_build_translation_messages(text, system_prompt),
+            max_tokens=MAX_TOKENS_PER_BUBBLE,
+            extra_body=_prompt_cache_body(system_prompt),
+        )
+        if debug:
+            _log_prompt_usage(response, bubble_id)
 
-    Text to translate: {text}""")
+        translated = response.choices[0].message.content.strip()
+        if cache:
+            cache.put(text, source_lang, target_lang, translated, model=TRANSLATION_MODEL, context=previous_text)
+        return translated
+    except Exception as e:
+        if debug:
+            print(f"Error translating text: {e}")
+        if failed is not None:
+            failed.add(text)
+        return text
+
+# Texts per batched translation request. Output is decoded token by token, so
+# very long pages are split into chunks that are translated concurrently
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "12"))
+
+async def _translate_batch_async(client, texts, system_prompt, source_lang, target_lang, debug=False, use_cache=True, previous_texts=None, failed=None):
+    """Translate a list of texts with one numbered JSON request, falling back to one request per text"""
+    numbered = "\n".join(f"{n}) {text}" for n, text in enumerate(texts, start=1))
+    prompt = f"""Translate each of the following numbered comic bubbles, which appear in this reading order on the page.
+    Return a JSON object of the form {{"translations": [...]}} with exactly {len(texts)} strings,
+    in the same order as the numbered bubbles, without the numbers.
 
-    prompt = "\n".join(prompt_parts)
+{numbered}"""
 
     try:
-        response = await client.chat.completions.create(
-            model="gpt-4o",
+        response = await create_chat_completion(
+            client,
+            model=TRANSLATION_MODEL,
             messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt,
+                },
                 {
                     "role": "user",
                     "content": prompt,
                 },
             ],
+            response_format={"type": "json_object"},
+            max_tokens=MAX_TOKENS_PER_BUBBLE * len(texts),
+            extra_body=_prompt_cache_body(system_prompt),
         )
-        translated = response.choices[0].message.content.strip()
-        return translated
-    except Exception as e:
         if debug:
-            print(f"Error translating text: {e}")
-        return text
+            _log_prompt_usage(response)
+        translations = json_loads(response.choices[0].message.content)["translations"]
+        if len(translations) != len(texts) or not all(isinstance(t, str) for t in translations):
+            raise ValueError(f"expected {len(texts)} translations, got {translations!r}")
+    except Exception as e:
+        print(f"Batched translation failed, falling back to per-text calls: {e}")
+        # translate_text_async caches its own successful results
+        return list(await asyncio.gather(*(
+            translate_text_async(
+                client, text, source_lang=source_lang, target_lang=target_lang,
+                debug=debug, use_cache=use_cache, system_prompt=system_prompt,
+                previous_text=previous_text, failed=failed
+            )
+            for text, previous_text in zip(texts, previous_texts or [None] * len(texts))
+        ))), False
+
+    return [translated.strip() for translated in translations], True
+
+def _needs_translation(text):
+    """Whether a bubble has words to translate ("!", "...", "?!" are kept as they are)"""
+    return any(char.isalpha() for char in text)
+
+async def translate_texts_async(client, texts, source_lang="English", target_lang="Russian", system_prompt=None, context_manager=None, debug=False, use_cache=True, previous_texts=None, failed=None):
+    """Translate a page's texts (in reading order) with context-aware batched requests.
+
+    Texts are sent together as numbered lists, so the model sees the page's
+    dialogue at once instead of every bubble re-sending the same context;
+    pages longer than TRANSLATION_BATCH_SIZE are split into concurrent chunks.
+    Cached texts and bubbles without letters are skipped; if a batched answer can't be parsed its texts
+    fall back to one request each.
+
+    previous_texts[i] is the line read just before texts[i] (the default is
+    the preceding text); a cached translation is only reused after the same line.
+    Texts that could not be translated are returned as they are and added to failed, when given.
+    """
+    if system_prompt is None:
+        system_prompt = build_translation_system_prompt(context_manager, source_lang, target_lang)
+    if previous_texts is None:
+        previous_texts = [None] + list(texts[:-1])
+
+    results = [None] * len(texts)
+    cache = get_translation_cache() if use_cache else None
+    pending = []
+    for i, text in enumerate(texts):
+        if not _needs_translation(text):
+            results[i] = text
+            continue
+        cached = cache.get(text, source_lang, target_lang, model=TRANSLATION_MODEL, context=previous_texts[i]) if cache else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+
+    if len(pending) == 1:
+        i = pending[0]
+        results[i] = await translate_text_async(
+            client, texts[i], source_lang=source_lang, target_lang=target_lang,
+            debug=debug, use_cache=use_cache, system_prompt=system_prompt,
+            previous_text=previous_texts[i], failed=failed
+        )
+        return results
+    if not pending:
+        return results
+
+    chunks = [pending[start:start + TRANSLATION_BATCH_SIZE] for start in range(0, len(pending), TRANSLATION_BATCH_SIZE)]
+    chunk_results = await asyncio.gather(*(
+        _translate_batch_async(
+            client, [texts[i] for i in chunk], system_prompt, source_lang, target_lang,
+            debug=debug, use_cache=use_cache, previous_texts=[previous_texts[i] for i in chunk],
+            failed=failed
+        )
+        for chunk in chunks
+    ))
+
+    for chunk, (translations, batched) in zip(chunks, chunk_results):
+        for i, translated in zip(chunk, translations):
+            results[i] = translated
+            if cache and batched:
+                cache.put(texts[i], source_lang, target_lang, translated, model=TRANSLATION_MODEL, context=previous_texts[i])
+    return results
 
 #%%
+@lru_cache(maxsize=1)
 def _find_matplotlib_font():
     """Find the DejaVuSans font bundled with matplotlib as ultimate fallback"""
     try:
@@ -278,8 +811,9 @@ def _find_matplotlib_font():
         pass
     return None
 
+@lru_cache(maxsize=None)
 def get_font_for_language(target_lang):
-    """Select appropriate font based on target language"""
+    """Select appropriate font based on target language (probed once per language)"""
     # Language-specific font mappings (macOS + Linux paths)
     font_mappings = {
         'Japanese': [
@@ -349,192 +883,336 @@ def get_font_for_language(target_lang):
 
     return None
 
-def draw_text_in_bubble(draw, text, bubble_info, target_lang="English", max_font_size=40, debug=False):
-    """Draw text inside a bubble, automatically wrapping and sizing to fit"""
+def cover_bubbles(img, bubbles, padding_factor=0.98):
+    """Cover the given bubbles with white filled ellipses drawn straight into the page buffer"""
+    if not bubbles:
+        return img
+
+    # Fill every ellipse in place with OpenCV; the page is converted back to PIL only once
+    img_arr = np.array(img)
+    white = (255,) * (img_arr.shape[2] if img_arr.ndim == 3 else 1)
+    # Ellipse geometry for all bubbles as one array: (center_x, center_y, width, height)
+    geometry = np.array([(b['center_x'], b['center_y'], b['width'], b['height']) for b in bubbles], dtype=np.float32)
+    centers = geometry[:, :2].astype(int).tolist()
+    axes = (geometry[:, 2:] / 2 * padding_factor).astype(int).tolist()
+    for center, axis in zip(centers, axes):
+        cv2.ellipse(img_arr, tuple(center), tuple(axis), 0, 0, 360, white, -1)
+
+    return Image.fromarray(img_arr)
+
+@lru_cache(maxsize=256)
+def _load_font(font_path, font_size):
+    """Load a TrueType font at the given size, falling back to PIL's default font.
+
+    Cached so the font file is parsed once per size rather than per bubble.
+    """
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except OSError:
+            pass
+    return ImageFont.load_default()
+
+def _wrap_text_to_width(text, font, max_width):
+    """Greedy word wrap using the font's real rendered widths.
+
+    Each word is measured once and line widths are accumulated from word and
+    space advances, instead of re-measuring the growing line for every word.
+    Words wider than max_width (e.g. CJK runs without spaces) are broken
+    between characters.
+    """
+    space_width = font.getlength(" ")
+    lines = []
+    current, current_width = "", 0.0
+    for word in text.split():
+        word_width = font.getlength(word)
+        if current and current_width + space_width + word_width <= max_width:
+            current += " " + word
+            current_width += space_width + word_width
+            continue
+        if current:
+            lines.append(current)
+        if word_width <= max_width:
+            current, current_width = word, word_width
+            continue
+        current, current_width = "", 0.0
+        for char in word:
+            char_width = font.getlength(char)
+            if current and current_width + char_width > max_width:
+                lines.append(current)
+                current, current_width = char, char_width
+            else:
+                current += char
+                current_width += char_width
+    if current:
+        lines.append(current)
+    return lines or [text]
+
+def _log_font_choice(font_path, target_lang):
+    """Report which font will be used for target_lang (debug output)"""
+    if font_path:
+        print(f"Using font: {font_path} for {target_lang}")
+    else:
+        print(f"⚠️ Warning: No appropriate font found for {target_lang}")
+
+# zlib level for rendered pages: default level 6 spends most of the save time
+# for a few percent of file size on large comic pages
+PNG_COMPRESS_LEVEL = int(os.getenv("PNG_COMPRESS_LEVEL", "1"))
+
+# Width of the white outline drawn around translated text, in pixels
+TEXT_STROKE_WIDTH = 1
+
+def draw_text_in_bubble(draw, text, bubble_info, target_lang="English", max_font_size=40, min_font_size=10, debug=False, font_path=None):
+    """Draw text inside a bubble, automatically wrapping and sizing to fit.
+
+    Callers drawing a whole page can resolve font_path once and pass it in.
+    """
     x = bubble_info['x']
     y = bubble_info['y']
     width = bubble_info['width']
     height = bubble_info['height']
     
     # Get appropriate font for language
-    font_path = get_font_for_language(target_lang)
-    
-    # Start with a large font and decrease until text fits
-    font_size = max_font_size
-    
-    while font_size > 8:
-        try:
-            if font_path:
-                font = ImageFont.truetype(font_path, font_size)
-                if debug:
-                    print(f"Using font: {font_path} for {target_lang}")
-            else:
-                font = ImageFont.load_default()
-                if debug:
-                    print(f"⚠️ Warning: No appropriate font found for {target_lang}")
-        except:
-            font = ImageFont.load_default()
-        
-        # Wrap text to fit width
-        avg_char_width = font_size * 0.6
-        max_chars_per_line = int(width * 0.8 / avg_char_width)
-        
-        if max_chars_per_line > 0:
-            wrapped_lines = textwrap.fill(text, width=max_chars_per_line).split('\n')
+    if font_path is None:
+        font_path = get_font_for_language(target_lang)
+        if debug:
+            _log_font_choice(font_path, target_lang)
+
+    # The outline widens every glyph by TEXT_STROKE_WIDTH on each side
+    max_width = width * 0.8 - 2 * TEXT_STROKE_WIDTH
+    max_height = height * 0.8
+
+    def layout(font_size):
+        """Wrap text at font_size; return (font, lines) if it fits in the bubble, else None"""
+        font = _load_font(font_path, font_size)
+        lines = _wrap_text_to_width(text, font, max_width)
+        if len(lines) * font_size * 1.2 > max_height:
+            return None
+        if max(font.getlength(line) for line in lines) > max_width:
+            return None
+        return font, lines
+
+    # Fitting is monotonic in font size, so binary-search the largest size that fits
+    best = None
+    # Even a single line must fit vertically, which bounds the search from above
+    lo, hi = min_font_size, min(max_font_size, int(max_height / 1.2))
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        fitted = layout(mid)
+        if fitted:
+            best = (mid, *fitted)
+            lo = mid + 1
         else:
-            wrapped_lines = [text]
-        
-        # Calculate total text height
-        line_height = font_size * 1.2
-        total_height = len(wrapped_lines) * line_height
-        
-        # Check if text fits in bubble
-        if total_height <= height * 0.8:
-            # Center text in bubble
-            text_y = y + (height - total_height) / 2
-            
-            for line in wrapped_lines:
-                # Get text width for centering
-                bbox = draw.textbbox((0, 0), line, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_x = x + (width - text_width) / 2
-                
-                # Draw text with outline for better visibility
-                # Draw outline
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx != 0 or dy != 0:
-                            draw.text((text_x + dx, text_y + dy), line, font=font, fill='white')
-                
-                # Draw main text
-                draw.text((text_x, text_y), line, font=font, fill='black')
-                
-                text_y += line_height
-            
-            return True
-        
-        font_size -= 2
+            hi = mid - 1
+
+    if best is None:
+        # If text doesn't fit, draw it anyway with smallest font
+        font = _load_font(font_path, min_font_size)
+        draw.text((x + 5, y + 5), text[:20] + "...", font=font, fill='black')
+        return False
+
+    font_size, font, wrapped_lines = best
+
+    # Center text in bubble
+    line_height = font_size * 1.2
+    total_height = len(wrapped_lines) * line_height
+    text_y = y + (height - total_height) / 2
+
+    for line in wrapped_lines:
+        # Advance width is enough for centering and skips textbbox's glyph compositing
+        text_width = font.getlength(line) + 2 * TEXT_STROKE_WIDTH
+        text_x = x + (width - text_width) / 2
+
+        # Draw text with a white outline for better visibility
+        # (stroke is rasterized in the same glyph pass as the fill)
+        draw.text((text_x, text_y), line, font=font, fill='black',
+                  stroke_width=TEXT_STROKE_WIDTH, stroke_fill='white')
+
+        text_y += line_height
+
+    return True
+
+def render_translated_page(page_img, bubble_data, output_path, target_lang="Russian", debug=False):
+    """Cover the original text of translated bubbles, draw their translations and save the page"""
+    # First, draw white ellipses to cover original text
+    img = cover_bubbles(page_img, [b for b in bubble_data if b['original_text'] not in ["EMPTY", "ERROR"]])
+    draw = ImageDraw.Draw(img)
+
+    # Then, draw translated text; the font only depends on the language, so resolve it once
+    font_path = get_font_for_language(target_lang)
+    if debug:
+        _log_font_choice(font_path, target_lang)
+    for bubble in bubble_data:
+        if bubble.get('translated_text') and bubble['translated_text'] not in ["EMPTY", "ERROR"]:
+            draw_text_in_bubble(draw, bubble['translated_text'], bubble, target_lang, debug=debug, font_path=font_path)
     
-    # If text doesn't fit, draw it anyway with smallest font
-    draw.text((x + 5, y + 5), text[:20] + "...", font=font, fill='black')
-    return False
+    # Save result (fast zlib level; ignored for non-PNG outputs)
+    img.save(output_path, compress_level=PNG_COMPRESS_LEVEL)
+
 #%%
-async def process_comic_page_with_languages(image_path, output_path, api_key=None, source_lang="English", target_lang="Russian", debug=False):
-    """Main function to process a comic page with multi-language support"""
-    
-    # Load bubble detection model
-    bubble_model = load_speech_bubble_model()
-    if not bubble_model:
-        logger.error("Failed to load speech bubble detection model")
-        return
+def page_fully_translated(bubble_data):
+    """Whether every bubble of a translated page was read and translated without an API error"""
+    return not any(bubble.get('translation_failed') for bubble in bubble_data)
+
+async def translate_page_async(image_path, source_lang="English", target_lang="Russian", debug=False, client=None, context_manager=None, bubble_data=None):
+    """Detect, read and translate a page's bubbles without rendering it.
+
+    image_path may also be encoded image bytes or a decoded PIL image, so
+    multi-page pipelines can hand pages over without a disk round-trip.
+    Returns (page_img, bubble_data) with 'original_text' and 'translated_text'
+    set on every bubble (see page_fully_translated), or None when the page has no bubbles. Rendering is
+    left to the caller (render_translated_page) so multi-page pipelines can
+    draw one page while the next is still being translated.
+    """
     
-    # Detect bubbles
-    logger.info("📍 Detecting speech bubbles...")
-    bubble_data = detect_speech_bubbles(bubble_model, image_path, conf_threshold=0.3)
+    # Decode the page once; it is shared by detection, the bubble crops and the final render
+    page_img = await asyncio.to_thread(load_page_image, image_path)
     
-    # Sort bubbles by position (top to bottom, left to right) for better context flow
-    bubble_data.sort(key=lambda b: (b['y'], b['x']))
+    if bubble_data is None:
+        # Load bubble detection model (blocking work runs off the shared event loop)
+        bubble_model = await asyncio.to_thread(load_speech_bubble_model)
+        if not bubble_model:
+            logger.error("Failed to load speech bubble detection model")
+            return None
+        
+        # Detect bubbles
+        logger.info("📍 Detecting speech bubbles...")
+        bubble_data = await asyncio.to_thread(detect_speech_bubbles, bubble_model, page_img, conf_threshold=BUBBLE_CONF_THRESHOLD)
     
     if not bubble_data:
         logger.warning("No speech bubbles detected in the image")
-        return
+        return None
     
     # Extract text from each bubble using async approach
     logger.info("📖 Extracting text from bubbles asynchronously...")
-    client = AsyncOpenAI()
+    # Reuse a pooled client so TLS connections survive across bubbles and pages
+    client = client or get_async_client()
     t0_extract = time.time()
-    
-    # Create tasks for text extraction
-    extraction_tasks = []
-    for bubble in bubble_data:
-        bubble_image = crop_bubble_region(image_path, bubble)
-        extraction_tasks.append(extract_text_from_bubble_async(client, bubble_image, bubble))
-    
-    # Execute all extraction tasks
-    extraction_results = await asyncio.gather(*extraction_tasks)
+
+    # The page's own bubbles are all part of the batched requests; context_manager
+    # only carries dialogue from earlier pages, so the system prompt is built once
+    system_prompt = build_translation_system_prompt(context_manager, source_lang, target_lang)
+
+    # Bubbles sharing the same text are translated once: whitespace-normalized text -> representative
+    unique_texts = {}
+    translation_tasks = []
+    # Texts whose translation failed (they fall back to the source text)
+    failed_texts = set()
+    # The line read before each text keys its cache entry, so the chain starts
+    # from the previous page's last line when there is a context
+    last_text = None
+    if context_manager is not None and context_manager.context_window:
+        last_text = context_manager.context_window[-1]['original']
+
+    # OCR batches can finish out of order (several workers, cache hits return at
+    # once); they are handed to translation in reading order so each text's
+    # preceding line, and so its cache key, doesn't depend on request timing
+    read_batches = {}
+    next_start = 0
+
+    def translate_batch(start, texts):
+        """Start translating OCR batches in reading order as soon as the ones before them are read"""
+        nonlocal next_start
+        read_batches[start] = texts
+        while next_start in read_batches:
+            texts = read_batches.pop(next_start)
+            next_start += len(texts)
+            translate_in_order(texts)
+
+    def translate_in_order(texts):
+        """Start translating the next batch of the page, skipping texts already in flight"""
+        nonlocal last_text
+        new_keys = []
+        previous_texts = []
+        for text in texts:
+            if text in ["EMPTY", "ERROR"]:
+                continue
+            # Whitespace only, like the translation cache key: "NO!" and "no!" stay apart
+            key = " ".join(text.split())
+            if key not in unique_texts:
+                unique_texts[key] = text
+                new_keys.append(key)
+                previous_texts.append(last_text)
+            last_text = text
+        if new_keys:
+            task = asyncio.create_task(translate_texts_async(
+                client,
+                [unique_texts[key] for key in new_keys],
+                source_lang=source_lang,
+                target_lang=target_lang,
+                system_prompt=system_prompt,
+                debug=debug,
+                previous_texts=previous_texts,
+                failed=failed_texts
+            ))
+            translation_tasks.append((new_keys, task))
+
+    # Crop -> OCR -> translate as one pipeline: each OCR batch is translated while
+    # later bubbles are still being cropped and read
+    extraction_results = await extract_page_texts_async(client, page_img, bubble_data, on_batch=translate_batch)
     tf_extract = time.time()
     logger.info(f"Time taken to extract text from bubbles: {tf_extract - t0_extract:.2f} seconds")
     
-    # Assign extracted text to bubbles and build translation context
-    context_manager = TranslationContext()
+    # Assign extracted text to bubbles
     for i, bubble in enumerate(bubble_data):
         bubble['original_text'] = extraction_results[i]
         logger.info(f"Bubble {bubble['bubble_id']}: {bubble['original_text']}")
-        # Add original text to context so all translations see surrounding dialogue
-        if bubble['original_text'] not in ["EMPTY", "ERROR"]:
-            context_manager.add_bubble_to_context(bubble['bubble_id'], bubble['original_text'])
 
-    # Translate texts asynchronously
+    # Wait for the translations still in flight
     logger.info(f"🌐 Translating from {source_lang} to {target_lang}...")
-    t0_translate = time.time()
-
-    # Create translation tasks only for bubbles with text
-    translation_tasks = []
-    translation_indices = []  # Track which bubbles are being translated
+    translations = {}
+    for keys, task in translation_tasks:
+        translations.update(zip(keys, await task))
 
-    for i, bubble in enumerate(bubble_data):
+    # Broadcast each result to every bubble sharing the text
+    translated_count = 0
+    for bubble in bubble_data:
         if bubble['original_text'] not in ["EMPTY", "ERROR"]:
-            translation_tasks.append(translate_text_async(
-                client,
-                bubble['original_text'],
-                context_manager=context_manager,
-                bubble_id=bubble['bubble_id'],
-                source_lang=source_lang,
-                target_lang=target_lang,
-                debug=debug
-            ))
-            translation_indices.append(i)
+            key = " ".join(bubble['original_text'].split())
+            bubble['translated_text'] = translations[key]
+            bubble['translation_failed'] = unique_texts[key] in failed_texts
+            translated_count += 1
+            if debug:
+                logger.info(f"✓ {bubble['original_text']} → {bubble['translated_text']}")
         else:
             logger.info(f"Bubble {bubble['bubble_id']} is empty or error. Skipping translation.")
             bubble['translated_text'] = bubble['original_text']
+            bubble['translation_failed'] = bubble['original_text'] == "ERROR"
 
-    # Execute translation tasks if any exist
-    if translation_tasks:
-        translation_results = await asyncio.gather(*translation_tasks)
+    # Carry this page's dialogue over to the next pages
+    if context_manager is not None:
+        for bubble in bubble_data:
+            if bubble['original_text'] not in ["EMPTY", "ERROR"]:
+                context_manager.add_bubble_to_context(bubble['bubble_id'], bubble['original_text'], bubble['translated_text'])
 
-        # Assign translation results to the correct bubbles
-        for task_index, bubble_index in enumerate(translation_indices):
-            bubble_data[bubble_index]['translated_text'] = translation_results[task_index]
-            if debug:
-                logger.info(f"✓ {bubble_data[bubble_index]['original_text']} → {bubble_data[bubble_index]['translated_text']}")
-    
-    await client.close()
-    
     tf_translate = time.time()
-    translated_count = len(translation_tasks)
-    logger.info(f"Time taken to translate {translated_count} bubbles: {tf_translate - t0_translate:.2f} seconds")
-    
-    # Create image with white bubbles
-    logger.info("🎨 Creating output image...")
-    img = Image.open(image_path).convert("RGBA")
-    draw = ImageDraw.Draw(img)
-    
-    # First, draw white ellipses to cover original text
-    for bubble in bubble_data:
-        if bubble['original_text'] not in ["EMPTY", "ERROR"]:
-            # Calculate ellipse parameters
-            center_x = bubble['center_x']
-            center_y = bubble['center_y']
-            
-            padding_factor = 0.98
-            semi_major = (bubble['width'] / 2) * padding_factor
-            semi_minor = (bubble['height'] / 2) * padding_factor
-            
-            left = center_x - semi_major
-            top = center_y - semi_minor
-            right = center_x + semi_major
-            bottom = center_y + semi_minor
-            
-            # Draw white filled ellipse
-            draw.ellipse([left, top, right, bottom], fill='white', outline='white')
+    logger.info(f"Translated {translated_count} bubbles ({len(unique_texts)} unique texts), {tf_translate - tf_extract:.2f} seconds after extraction finished")
     
-    # Then, draw translated text
-    for bubble in bubble_data:
-        if bubble.get('translated_text') and bubble['translated_text'] not in ["EMPTY", "ERROR"]:
-            draw_text_in_bubble(draw, bubble['translated_text'], bubble, target_lang, debug=debug)
+    return page_img, bubble_data
+
+async def process_comic_page_with_languages(image_path, output_path, api_key=None, source_lang="English", target_lang="Russian", debug=False, client=None, context_manager=None, bubble_data=None):
+    """Main function to process a comic page with multi-language support.
+
+    Pass a shared TranslationContext as context_manager to carry dialogue
+    and character names across consecutive pages, and bubble_data when the
+    page's bubbles were already detected in a batch (detect_speech_bubbles_batch).
+    """
+    translated = await translate_page_async(
+        image_path,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        debug=debug,
+        client=client,
+        context_manager=context_manager,
+        bubble_data=bubble_data
+    )
+    if translated is None:
+        return
+    page_img, bubble_data = translated
     
-    # Save result
-    img.save(output_path)
+    # Cover, draw and encode the page in a worker thread
+    logger.info("🎨 Creating output image...")
+    await asyncio.to_thread(render_translated_page, page_img, bubble_data, output_path, target_lang, debug)
     logger.info(f"✅ Saved translated comic to: {output_path}")
     
     # Log final summary
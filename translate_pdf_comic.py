@@ -6,18 +6,196 @@ translate_comic_series to process them with continuous context.
 """
 
 import os
+import io
+import re
+import hashlib
 import tempfile
 import shutil
+import threading
+from functools import lru_cache
 from pathlib import Path
-from translate_and_fill_bubbles_multilang import process_comic_page_with_languages
+from translate_and_fill_bubbles_multilang import (
+    translate_page_async, render_translated_page, get_async_client, run_coroutine,
+    load_speech_bubble_model, detect_speech_bubbles_batch, BUBBLE_CONF_THRESHOLD, YOLO_BATCH_SIZE,
+    TRANSLATION_MODEL, PNG_COMPRESS_LEVEL, load_page_image, page_fully_translated,
+)
 from dotenv import load_dotenv
 import fitz
 from PIL import Image
 import glob
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat, islice
+from collections import deque
+import logging
+logger = logging.getLogger('comic_translator')
+# libvips decodes pages sequentially instead of holding whole decoded copies; optional
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
+# Load environment variables once, not on every translation (the web app runs many)
+load_dotenv()
 
 
-def extract_pdf_pages(pdf_path, output_dir="temp_pdf_pages", dpi=300, debug=False):
+# Pages translated concurrently within one PDF
+PAGE_CONCURRENCY = int(os.getenv("PAGE_CONCURRENCY", "4"))
+# Seconds the render thread waits on a full page queue before checking whether
+# the job was abandoned
+RENDER_HANDOVER_TIMEOUT = 0.5
+
+# Rasterizing and encoding pages is CPU-bound (and PyMuPDF holds the GIL),
+# so larger PDFs are rendered in a process pool; small ones aren't worth the spawn
+RENDER_POOL_MIN_PAGES = 4
+# Rendering stops scaling after a few workers (memory bandwidth), and every
+# spawned worker pays for importing the translator, so the pool is capped
+RENDER_MAX_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "6"))
+
+# Long edge, in pixels, pages are rendered at: the vision API downsamples
+# anything larger, and a 300 DPI page has ~4x the pixels to rasterize and
+# encode. dpi stays an upper bound; PDF_PAGE_TARGET_PX=0 renders at dpi alone
+PAGE_TARGET_PX = int(os.getenv("PDF_PAGE_TARGET_PX", "1536"))
+
+# Quality of the page images embedded by images_to_pdf (Pillow's PDF writer default)
+PDF_JPEG_QUALITY = 75
+
+# Extracted pages are only intermediates (translated pages are still saved as PNG),
+# and a 300 DPI page encodes several times faster as JPEG than as PNG
+PAGE_JPEG_QUALITY = 92
+
+# Translated pages are cached by content, so re-running a PDF (or retrying a
+# failed job) doesn't pay for pages that were already translated.
+# COMIC_CACHE_DIR="" disables the cache
+PAGE_CACHE_DIR = os.getenv("COMIC_CACHE_DIR", ".translated_page_cache")
+
+def page_cache_path(page_bytes, source_lang, target_lang):
+    """Cache location of a page's translation, keyed by its encoded image, languages and model"""
+    if not PAGE_CACHE_DIR:
+        return None
+    digest = hashlib.sha256(page_bytes)
+    digest.update(f"\x1f{source_lang}\x1f{target_lang}\x1f{TRANSLATION_MODEL}".encode('utf-8'))
+    return os.path.join(PAGE_CACHE_DIR, f"{digest.hexdigest()}.png")
+
+def write_atomically(write, path):
+    """Call write(tmp_path) and move the result to path, so an existing file is always complete"""
+    # A unique hidden temp file next to path, with the same extension (the image
+    # format is picked from it); concurrent jobs may write the same file
+    base, ext = os.path.splitext(os.path.basename(path))
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{base}.", suffix=ext)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def store_cached_page(output_file, cache_path):
+    """Copy a translated page into the cache (atomically, so readers never see partial files)"""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    write_atomically(lambda tmp_path: shutil.copyfile(output_file, tmp_path), cache_path)
+
+@lru_cache(maxsize=4)
+def _open_pdf(pdf_path, mtime_ns):
+    """Open a PDF once per process and file version, with a lock guarding its use"""
+    return fitz.open(pdf_path), threading.Lock()
+
+def open_pdf(pdf_path):
+    """Return the cached (document, lock) of a PDF, reopened when the file changes"""
+    return _open_pdf(pdf_path, os.stat(pdf_path).st_mtime_ns)
+
+def _render_pixmap(doc, page_num, zoom, target_px=None):
+    """Rasterize one page of an open document (call with the document's lock held)"""
+    page = doc.load_page(page_num)
+    if target_px:
+        # Pages can differ in size, so the zoom is picked per page
+        zoom = min(zoom, target_px / max(page.rect.width, page.rect.height))
+    # Opaque RGB: comic pages have no transparency, and JPEG can't store it anyway
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+
+def _render_page_bytes(pdf_path, page_num, zoom, target_px=None):
+    """Render one PDF page to JPEG bytes (runs in a worker process)"""
+    # Documents can't be shared between processes, so each worker opens its own,
+    # once, instead of re-parsing the PDF for every page it renders
+    doc, doc_lock = open_pdf(pdf_path)
+    with doc_lock:
+        pix = _render_pixmap(doc, page_num, zoom, target_px)
+        return pix.tobytes("jpeg", jpg_quality=PAGE_JPEG_QUALITY)
+
+def _render_page_image(pdf_path, page_num, zoom, target_px=None):
+    """Render one PDF page to a PIL image, straight from the pixmap's samples"""
+    doc, doc_lock = open_pdf(pdf_path)
+    with doc_lock:
+        pix = _render_pixmap(doc, page_num, zoom, target_px)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+def _render_page(pdf_path, page_num, zoom, output_path, target_px=None):
+    """Render one PDF page to an image file (runs in a worker process)"""
+    with open(output_path, 'wb') as f:
+        f.write(_render_page_bytes(pdf_path, page_num, zoom, target_px))
+    return output_path
+
+def count_pdf_pages(pdf_path):
+    """Return the number of pages in a PDF"""
+    doc, doc_lock = open_pdf(pdf_path)
+    with doc_lock:
+        return len(doc)
+
+def _map_pages(render, pdf_path, page_nums, *args):
+    """Yield render(pdf_path, page_num, *args) for every page number (0-based), in order"""
+    page_nums = list(page_nums)
+    workers = min(os.cpu_count() or 1, RENDER_MAX_WORKERS, len(page_nums))
+    if len(page_nums) >= RENDER_POOL_MIN_PAGES and workers > 1:
+        # spawn, not fork: the web app calls this from a thread of a multi-threaded process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Only a sliding window of pages is submitted, so workers stay busy without
+            # rendering ahead of a slow consumer and holding the whole PDF in memory
+            jobs = zip(page_nums, zip(*args))
+            window = deque(
+                executor.submit(render, pdf_path, page_num, *page_args)
+                for page_num, page_args in islice(jobs, 2 * workers)
+            )
+            try:
+                while window:
+                    page = window.popleft().result()
+                    for page_num, page_args in islice(jobs, 1):
+                        window.append(executor.submit(render, pdf_path, page_num, *page_args))
+                    yield page
+            finally:
+                # Stopped early (error or closed generator): drop the pages not started yet
+                for future in window:
+                    future.cancel()
+    else:
+        for page_num, page_args in zip(page_nums, zip(*args)):
+            yield render(pdf_path, page_num, *page_args)
+
+def iter_pdf_pages(pdf_path, output_dir="temp_pdf_pages", dpi=300, page_count=None, target_px=PAGE_TARGET_PX):
+    """Render the pages of a PDF to image files, yielding each path in page order as soon as it exists"""
+    os.makedirs(output_dir, exist_ok=True)
+    if page_count is None:
+        page_count = count_pdf_pages(pdf_path)
+    
+    # Calculate zoom factor for desired DPI
+    zoom = dpi / 72.0  # 72 is default DPI
+    output_paths = [os.path.join(output_dir, f"page_{page_num + 1:03d}.jpg") for page_num in range(page_count)]
+    yield from _map_pages(_render_page, pdf_path, range(page_count), repeat(zoom), output_paths, repeat(target_px))
+
+def iter_pdf_page_bytes(pdf_path, dpi=300, page_count=None, target_px=PAGE_TARGET_PX, page_nums=None):
+    """Render the pages of a PDF in memory, yielding each page's JPEG bytes in page order
+
+    page_nums limits rendering to those (0-based) pages.
+    """
+    if page_nums is None:
+        if page_count is None:
+            page_count = count_pdf_pages(pdf_path)
+        page_nums = range(page_count)
+    zoom = dpi / 72.0
+    yield from _map_pages(_render_page_bytes, pdf_path, page_nums, repeat(zoom), repeat(target_px))
+
+def extract_pdf_pages(pdf_path, output_dir="temp_pdf_pages", dpi=300, debug=False, target_px=PAGE_TARGET_PX,
+                      in_memory=False):
     """
     Extract all pages from a PDF file as high-quality images
     
@@ -26,44 +204,37 @@ def extract_pdf_pages(pdf_path, output_dir="temp_pdf_pages", dpi=300, debug=Fals
         output_dir: Directory to save extracted images
         dpi: Resolution for image extraction (higher = better quality)
         debug: Enable detailed output
+        target_px: Cap on the long edge of each page in pixels (None = dpi only)
+        in_memory: Return decoded PIL images instead of writing files (no encode/decode round-trip)
     
     Returns:
-        List of extracted image file paths
+        List of extracted image file paths (PIL images when in_memory is set)
     """
     method = "pymupdf" 
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
     
     if debug:
         print(f"📄 Extracting pages from {pdf_path} using {method}...")
     else:
         print(f"📄 Extracting pages from PDF...")
-    extracted_files = []
             
     # Use PyMuPDF
     try:
-        doc = fitz.open(pdf_path)
+        page_count = count_pdf_pages(pdf_path)
         if debug:
-            print(f"✅ Found {len(doc)} pages in PDF")
+            print(f"✅ Found {page_count} pages in PDF")
         else:
-            print(f"✅ Found {len(doc)} pages")
+            print(f"✅ Found {page_count} pages")
         
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            
-            # Calculate zoom factor for desired DPI
-            zoom = dpi / 72.0  # 72 is default DPI
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Render page as image
-            pix = page.get_pixmap(matrix=mat)
-            output_path = os.path.join(output_dir, f"page_{page_num + 1:03d}.png")
-            pix.save(output_path)
-            extracted_files.append(output_path)
-            if debug:
-                print(f"📖 Extracted page {page_num + 1} → {output_path}")
+        if in_memory:
+            pages = _map_pages(_render_page_image, pdf_path, range(page_count), repeat(dpi / 72.0), repeat(target_px))
+        else:
+            pages = iter_pdf_pages(pdf_path, output_dir, dpi, page_count, target_px)
         
-        doc.close()
+        extracted_files = []
+        for page in pages:
+            extracted_files.append(page)
+            if debug:
+                print(f"📖 Extracted page {len(extracted_files)} → {page}")
         
     except Exception as e:
         print(f"❌ Error with PyMuPDF: {e}")
@@ -75,26 +246,29 @@ def extract_pdf_pages(pdf_path, output_dir="temp_pdf_pages", dpi=300, debug=Fals
 
 def translate_pdf_comic(pdf_path, output_prefix="translated_pdf_page", 
                        temp_dir="temp_pdf_pages", dpi=300, cleanup=True, debug=False,
-                       source_lang="English", target_lang="Russian", status_callback=None):
+                       source_lang="English", target_lang="Russian", status_callback=None,
+                       target_px=PAGE_TARGET_PX, resume=False):
     """
     Translate an entire PDF comic book while preserving context across pages
     
     Args:
         pdf_path: Path to the input PDF file
         output_prefix: Prefix for output image files (e.g., "translated_pdf_page" -> "translated_pdf_page_1.png")
-        temp_dir: Directory for temporary page files
-        dpi: DPI for page extraction
+        temp_dir: Directory for temporary page files (pages are now kept in memory;
+            an existing directory is still removed on cleanup)
+        dpi: DPI for page extraction (an upper bound when target_px is set)
         cleanup: Whether to clean up temporary files
         debug: Enable detailed output
         source_lang: Source language name (e.g., "English")
         target_lang: Target language name (e.g., "Russian")
         status_callback: Optional callback function to report progress (current_page, total_pages, message)
+        target_px: Cap on the long edge of each rendered page in pixels (None = dpi only)
+        resume: Keep pages whose output file already exists (continues an interrupted run;
+            only safe when output_prefix belongs to this PDF)
     
     Returns:
         List of translated image file paths
     """
-    # Load environment variables
-    load_dotenv()
     api_key = os.getenv("OPENAI_API_KEY")
 
     if not api_key:
@@ -119,49 +293,206 @@ def translate_pdf_comic(pdf_path, output_prefix="translated_pdf_page",
         print(f"🌐 Translation: {source_lang} → {target_lang}")
     
     try:
-        # Step 1: Extract pages from PDF
+        # Step 1 and 2 run as one pipeline: pages are rasterized in a worker
+        # thread and each one is detected and translated as soon as it exists,
+        # instead of the first page waiting for the whole PDF to be rendered.
+        # Pages stay in memory: each one is decoded once and that image is
+        # shared by detection, OCR crops and the final render
         if debug:
             print("📋 Step 1: Extracting pages from PDF...")
         if status_callback:
             status_callback(0, 0, "Extracting pages from PDF...")
-            
-        page_files = extract_pdf_pages(pdf_path, temp_dir, dpi, debug)
         
-        if not page_files:
+        total_pages = count_pdf_pages(pdf_path)
+        if not total_pages:
             print("❌ Failed to extract pages from PDF")
             return []
+        print(f"✅ Found {total_pages} pages")
         
-        # Step 2: Translate all pages with context preservation
-        if debug:
-            print(f"\n📋 Step 2: Translating {len(page_files)} pages with context preservation...")
+        # Outputs are named by page number, so an interrupted run only has to
+        # render and translate the pages it didn't get to
+        done_files = {}
+        if resume:
+            for page_num in range(1, total_pages + 1):
+                output_file = f"{output_prefix}_{page_num}.png"
+                if os.path.exists(output_file):
+                    done_files[page_num] = output_file
+            if done_files:
+                print(f"⏭️ Resuming: {len(done_files)} of {total_pages} pages already translated")
+        pending_pages = [page_num for page_num in range(1, total_pages + 1) if page_num not in done_files]
         
-        # Process each page with the multilang version
-        translated_files = []
-        total_pages = len(page_files)
+        bubble_model = load_speech_bubble_model() if pending_pages else None
+        if pending_pages and not bubble_model:
+            print("❌ Failed to load speech bubble detection model")
+            return []
+        
+        if debug:
+            print(f"\n📋 Step 2: Translating {total_pages} pages as they are extracted...")
         
-        for i, page_file in enumerate(page_files):
-            current_page = i + 1
-            if status_callback:
-                status_callback(current_page, total_pages, f"Translating page {current_page} of {total_pages}")
+        async def translate_pages():
+            # Pages are independent, so several are translated at once (their API
+            # calls still share the global request limit); each page is drawn and
+            # saved in a worker thread as soon as its translations are in.
+            # Everything runs on the shared event loop so every page (and every
+            # later job) reuses the same pooled OpenAI connection
+            client = get_async_client()
+            loop = asyncio.get_running_loop()
+            page_slots = asyncio.Semaphore(PAGE_CONCURRENCY)
+            # Bounded, so rendering can't run far ahead of detection
+            rendered = asyncio.Queue(maxsize=2 * PAGE_CONCURRENCY)
+            # Decoded pages waiting for (or in) translation, so detection can't
+            # run far ahead of translation and hold the whole PDF in memory
+            decoded_slots = asyncio.Semaphore(PAGE_CONCURRENCY + YOLO_BATCH_SIZE)
+            # Resumed pages count as done in the progress reports
+            started = len(done_files)
+            
+            # Set when the consumer gives up, so the render thread doesn't wait
+            # forever on a queue nobody drains (and its worker is given back)
+            stop_rendering = threading.Event()
+            
+            def hand_over(item):
+                """Queue an item from the render thread; False once rendering was stopped"""
+                while not stop_rendering.is_set():
+                    try:
+                        asyncio.run_coroutine_threadsafe(
+                            asyncio.wait_for(rendered.put(item), RENDER_HANDOVER_TIMEOUT), loop
+                        ).result()
+                        return True
+                    except asyncio.TimeoutError:
+                        continue
+                return False
+            
+            def render_pages():
+                """Rasterize pages in a worker thread, handing each one over as soon as it is encoded"""
+                pages = iter_pdf_page_bytes(pdf_path, dpi, target_px=target_px,
+                                            page_nums=[page_num - 1 for page_num in pending_pages])
+                try:
+                    for page_num, page_bytes in zip(pending_pages, pages):
+                        if debug:
+                            print(f"📖 Extracted page {page_num} ({len(page_bytes) // 1024} KB)")
+                        if not hand_over((page_num, page_bytes)):
+                            break
+                finally:
+                    pages.close()
+                    hand_over(None)
+            
+            def decode_pages(batch):
+                """Hash every page for the cache, and decode the ones that aren't cached"""
+                cache_paths = [page_cache_path(page_bytes, source_lang, target_lang) for page_bytes in batch]
+                page_imgs = [
+                    None if cache_path and os.path.exists(cache_path) else load_page_image(page_bytes)
+                    for page_bytes, cache_path in zip(batch, cache_paths)
+                ]
+                return cache_paths, page_imgs
+            
+            async def copy_cached_page(page_num, cache_path):
+                output_file = f"{output_prefix}_{page_num}.png"
+                try:
+                    await asyncio.to_thread(write_atomically, lambda tmp_path: shutil.copyfile(cache_path, tmp_path), output_file)
+                finally:
+                    decoded_slots.release()
+                if debug:
+                    print(f"♻️ Reused cached translation for page {page_num}/{total_pages}")
+                return output_file
+            
+            async def translate_one(page_num, page_img, bubble_data, cache_path=None):
+                nonlocal started
+                output_file = f"{output_prefix}_{page_num}.png"
+                try:
+                    async with page_slots:
+                        started += 1
+                        if status_callback:
+                            status_callback(started, total_pages, f"Translating page {started} of {total_pages}")
+                        result = await translate_page_async(
+                            page_img,
+                            source_lang=source_lang,
+                            target_lang=target_lang,
+                            debug=debug,
+                            client=client,
+                            bubble_data=bubble_data
+                        )
+                    # Outputs appear complete or not at all, so --resume never keeps a truncated page
+                    if result is None:
+                        # Nothing to translate: keep the page as it is
+                        await asyncio.to_thread(write_atomically, lambda tmp_path: page_img.save(
+                            tmp_path, compress_level=PNG_COMPRESS_LEVEL), output_file)
+                    else:
+                        page_img, bubble_data = result
+                        await asyncio.to_thread(write_atomically, lambda tmp_path: render_translated_page(
+                            page_img, bubble_data, tmp_path, target_lang, debug), output_file)
+                        # A page with unread or untranslated bubbles is kept out of the
+                        # cache, so a retry translates it again instead of copying it
+                        if not page_fully_translated(bubble_data):
+                            cache_path = None
+                finally:
+                    decoded_slots.release()
+                if cache_path:
+                    await asyncio.to_thread(store_cached_page, output_file, cache_path)
                 
-            output_file = f"{output_prefix}_{current_page}.png"
-            asyncio.run(process_comic_page_with_languages(
-                page_file,
-                output_file,
-                api_key,
-                source_lang=source_lang,
-                target_lang=target_lang,
-                debug=debug
-            ))
-            translated_files.append(output_file)
+                if debug:
+                    print(f"✅ Completed page {page_num}/{total_pages}")
+                return output_file
             
-            if debug:
-                print(f"✅ Completed page {current_page}/{total_pages}")
+            # The render thread waits on the queue for the whole job, so it gets a thread
+            # of its own: on the shared loop's default executor, enough concurrent jobs
+            # would hold every worker and starve the to_thread calls they wait on
+            render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-pages")
+            producer = loop.run_in_executor(render_executor, render_pages)
+            render_executor.shutdown(wait=False)
+            page_tasks = {}
+            finished = False
+            try:
+                while not finished:
+                    # Take every page that is ready, up to one YOLO batch (each
+                    # page holds a decoded slot until its task is done)
+                    await decoded_slots.acquire()
+                    batch = [await rendered.get()]
+                    while len(batch) < YOLO_BATCH_SIZE and not rendered.empty() and not decoded_slots.locked():
+                        await decoded_slots.acquire()
+                        batch.append(rendered.get_nowait())
+                    if batch[-1] is None:
+                        batch.pop()
+                        decoded_slots.release()
+                        finished = True
+                    if not batch:
+                        continue
+                    
+                    # Pages translated before are copied from the cache; only the rest are decoded and detected
+                    page_nums = [page_num for page_num, _ in batch]
+                    cache_paths, page_imgs = await asyncio.to_thread(decode_pages, [page_bytes for _, page_bytes in batch])
+                    misses = [page_img for page_img in page_imgs if page_img is not None]
+                    detections = iter(await asyncio.to_thread(
+                        detect_speech_bubbles_batch, bubble_model, misses, conf_threshold=BUBBLE_CONF_THRESHOLD
+                    ))
+                    for page_num, page_img, cache_path in zip(page_nums, page_imgs, cache_paths):
+                        if page_img is None:
+                            task = copy_cached_page(page_num, cache_path)
+                        else:
+                            task = translate_one(page_num, page_img, next(detections), cache_path)
+                        page_tasks[page_num] = asyncio.create_task(task)
+                
+                # Surface rendering errors (the sentinel is queued either way)
+                await producer
+                translated = await asyncio.gather(*page_tasks.values())
+            except BaseException:
+                # Release the render thread (it may be blocked on the full queue)
+                # and stop the pages in flight before giving up on the PDF
+                stop_rendering.set()
+                while not rendered.empty():
+                    rendered.get_nowait()
+                for task in page_tasks.values():
+                    task.cancel()
+                await asyncio.gather(producer, *page_tasks.values(), return_exceptions=True)
+                raise
+            output_files = {**done_files, **dict(zip(page_tasks, translated))}
+            return [output_files[page_num] for page_num in sorted(output_files)]
+        
+        translated_files = run_coroutine(translate_pages())
         
         if debug:
             print(f"\n{'='*80}")
             print(f"🎉 PDF Comic Translation Complete!")
-            print(f"📊 Processed: {len(page_files)} pages")
+            print(f"📊 Processed: {total_pages} pages")
             print(f"📁 Generated: {len(translated_files)} translated images")
             print(f"💾 Output files: {output_prefix}_1.png to {output_prefix}_{len(translated_files)}.png")
             print(f"{'='*80}")
@@ -172,10 +503,14 @@ def translate_pdf_comic(pdf_path, output_prefix="translated_pdf_page",
         # Step 4: Cleanup temporary files
         if cleanup and os.path.exists(temp_dir):
             if debug:
-                print(f"\n🧹 Cleaning up temporary files in {temp_dir}...")
-            shutil.rmtree(temp_dir)
-            if debug:
-                print("✅ Cleanup complete")
+                print(f"\n🧹 Cleaning up temporary files in {temp_dir} in the background...")
+            # Nobody waits on the deletion, so it overlaps with whatever the caller
+            # does next (non-daemon: the interpreter still finishes it on exit).
+            # A leftover directory must not turn a finished translation into a failure
+            threading.Thread(
+                target=shutil.rmtree, args=(temp_dir,), kwargs={'ignore_errors': True},
+                name=f"cleanup-{os.path.basename(temp_dir)}",
+            ).start()
         
         return translated_files
         
@@ -183,7 +518,8 @@ def translate_pdf_comic(pdf_path, output_prefix="translated_pdf_page",
         print(f"❌ Error during PDF translation: {e}")
         return []
 
-def batch_translate_pdfs(pdf_directory, output_directory="translated_comics", debug=False):
+def batch_translate_pdfs(pdf_directory, output_directory="translated_comics", debug=False, target_px=PAGE_TARGET_PX,
+                         resume=False):
     """
     Translate multiple PDF files in a directory
     
@@ -191,8 +527,15 @@ def batch_translate_pdfs(pdf_directory, output_directory="translated_comics", de
         pdf_directory: Directory containing PDF files
         output_directory: Directory to save translated comics
         debug: Enable detailed output
+        target_px: Cap on the long edge of each rendered page in pixels
+        resume: Keep pages translated by an earlier run (finished PDFs are only counted)
     """
-    pdf_files = list(Path(pdf_directory).glob("*.pdf"))
+    # One directory pass; scandir already knows each entry's type, so no stat per file
+    with os.scandir(pdf_directory) as entries:
+        pdf_files = sorted(
+            Path(entry.path) for entry in entries
+            if entry.name.lower().endswith(".pdf") and entry.is_file()
+        )
     
     if not pdf_files:
         print(f"❌ No PDF files found in {pdf_directory}")
@@ -218,7 +561,9 @@ def batch_translate_pdfs(pdf_directory, output_directory="translated_comics", de
             str(pdf_file), 
             output_prefix,
             temp_dir=f"temp_{comic_name}_pages",
-            debug=debug
+            debug=debug,
+            target_px=target_px,
+            resume=resume
         )
         
         if translated_files:
@@ -226,6 +571,29 @@ def batch_translate_pdfs(pdf_directory, output_directory="translated_comics", de
         else:
             print(f"❌ Failed to translate {pdf_file.name}")
 
+# Page files end with their number: "translated_pdf_page_12.png", "page_012.jpg"
+_PAGE_NUMBER = re.compile(r'(\d+)\.\w+$')
+
+def _page_number(path):
+    """Page number at the end of an image filename, or infinity when there is none"""
+    match = _PAGE_NUMBER.search(os.path.basename(path))
+    return int(match.group(1)) if match else float('inf')
+
+def _encode_pdf_page(img_path):
+    """Decode an image and re-encode it as the JPEG stream of a PDF page"""
+    if pyvips is not None:
+        image = pyvips.Image.new_from_file(img_path, access='sequential').colourspace('srgb')
+        if image.hasalpha():
+            # Drop alpha the way Pillow's convert('RGB') does
+            image = image.extract_band(0, n=image.bands - 1)
+        return image.width, image.height, image.jpegsave_buffer(Q=PDF_JPEG_QUALITY)
+    with Image.open(img_path) as img:
+        # Convert to RGB if necessary (PDF requires RGB)
+        rgb_img = img if img.mode == 'RGB' else img.convert('RGB')
+        buffer = io.BytesIO()
+        rgb_img.save(buffer, format='JPEG', quality=PDF_JPEG_QUALITY)
+        return img.width, img.height, buffer.getvalue()
+
 def images_to_pdf(image_pattern, output_pdf="translated_manga.pdf", page_order=None):
     """
     Convert a list of images to a PDF file
@@ -238,44 +606,35 @@ def images_to_pdf(image_pattern, output_pdf="translated_manga.pdf", page_order=N
     # Get list of image files
     if isinstance(image_pattern, str):
         image_files = glob.glob(image_pattern)
-        # Sort by page number if they follow your naming convention
-        image_files.sort(key=lambda x: int(x.split('_page_')[1].split('.')[0]))
+        # Sort by page number (numerically, so page 10 comes after page 9)
+        image_files.sort(key=lambda path: (_page_number(path), path))
     else:
         image_files = image_pattern
     
     if page_order:
-        # Reorder according to specified order
-        ordered_files = []
-        for page_num in page_order:
-            matching_files = [f for f in image_files if f"page_{page_num}" in f]
-            if matching_files:
-                ordered_files.append(matching_files[0])
-        image_files = ordered_files
+        # Reorder according to specified order (the first file wins for a repeated number)
+        files_by_page = {}
+        for path in image_files:
+            files_by_page.setdefault(_page_number(path), path)
+        image_files = [files_by_page[page_num] for page_num in page_order if page_num in files_by_page]
     
     if not image_files:
         print("No image files found!")
         return
     
-    # Convert first image to RGB and prepare for PDF
-    images = []
-    for img_path in image_files:
-        img = Image.open(img_path)
-        # Convert to RGB if necessary (PDF requires RGB)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        images.append(img)
-        print(f"Added: {os.path.basename(img_path)}")
-    
-    # Save as PDF
-    if images:
-        images[0].save(
-            output_pdf, 
-            save_all=True, 
-            append_images=images[1:], 
-            format='PDF'
-        )
-        print(f"✅ Successfully created PDF: {output_pdf}")
-        print(f"📄 {len(images)} pages combined")
+    # Pages are added one at a time and only their JPEG streams are kept, so
+    # memory doesn't grow with decoded pages (Pillow's PDF writer holds them all).
+    # Decoding and encoding release the GIL, so pages are prepared in threads
+    with fitz.open() as pdf, ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        for img_path, (width, height, jpeg_bytes) in zip(image_files, executor.map(_encode_pdf_page, image_files)):
+            page = pdf.new_page(width=width, height=height)
+            page.insert_image(page.rect, stream=jpeg_bytes)
+            logger.debug(f"Added: {os.path.basename(img_path)}")
+        
+        # Save as PDF
+        pdf.save(output_pdf)
+    print(f"✅ Successfully created PDF: {output_pdf}")
+    print(f"📄 {len(image_files)} pages combined")
     
 # Example usage and CLI interface
 if __name__ == "__main__":
@@ -286,6 +645,18 @@ if __name__ == "__main__":
     if debug_mode:
         sys.argv.remove("--debug")
     
+    # Long-edge cap for rendered pages, e.g. --target-px=2048 (0 renders at full DPI)
+    target_px = PAGE_TARGET_PX
+    for arg in sys.argv[1:]:
+        if arg.startswith("--target-px="):
+            target_px = int(arg.split("=", 1)[1])
+            sys.argv.remove(arg)
+    
+    # Continue an interrupted run, keeping the pages it already wrote
+    resume = "--resume" in sys.argv
+    if resume:
+        sys.argv.remove("--resume")
+    
     if len(sys.argv) < 2:
         print("📖 PDF Comic Translation Tool")
         print("\nUsage:")
@@ -298,6 +669,8 @@ if __name__ == "__main__":
         print("  python translate_pdf_comic.py --batch ./comic_pdfs/ --debug")
         print("\nFlags:")
         print("  --debug    Show detailed output including bubble contents and translations")
+        print(f"  --target-px=N    Render pages with a long edge of at most N pixels (default {PAGE_TARGET_PX}, 0 = full DPI)")
+        print("  --resume   Keep pages already written under the output prefix and translate the rest")
         print("\nRequired dependencies:")
         print("  pip install PyMuPDF")
         sys.exit(1)
@@ -309,9 +682,10 @@ if __name__ == "__main__":
         if len(sys.argv) < 3:
             print("❌ Please specify directory containing PDF files")
             sys.exit(1)
-        batch_translate_pdfs(sys.argv[2], debug=debug_mode)
+        batch_translate_pdfs(sys.argv[2], debug=debug_mode, target_px=target_px, resume=resume)
     else:
         pdf_path = sys.argv[1]
         output_prefix = sys.argv[2] if len(sys.argv) > 2 else "translated_pdf_page"
-        translated_files = translate_pdf_comic(pdf_path, output_prefix, debug=debug_mode) 
+        translated_files = translate_pdf_comic(pdf_path, output_prefix, debug=debug_mode, target_px=target_px,
+                                               resume=resume)
         images_to_pdf(translated_files, output_pdf=f"translated_{pdf_path}")
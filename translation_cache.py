@@ -0,0 +1,122 @@
+"""
+Translation Cache
+
+This module persists finished translations in a small SQLite database.
+Short phrases repeat constantly in comics ("Huh?", "Watch out!", character
+names), so each (source language, target language, text, speaker) tuple is
+only sent to the model once, across bubbles, pages and runs. Translations
+made in context are also keyed by the line before them, so "Watch out!"
+after a different exchange is translated again rather than reused.
+
+Bubble OCR results are stored alongside, keyed by a hash of the encoded
+crop, so recurring SFX bubbles and republished pages are not re-read either.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = ".translation_cache.sqlite"
+# Translations older than this are re-requested, so prompt or model improvements
+# eventually reach cached phrases (TRANSLATION_CACHE_TTL_DAYS=0 keeps them forever)
+DEFAULT_TTL_DAYS = 14
+
+
+class TranslationCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+        """Open (or create) the cache database at path, dropping expired translations"""
+        self.path = path
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        # Flask runs jobs on background threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translated TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_texts (key TEXT PRIMARY KEY, text TEXT NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(translations)")]
+        if "created" not in columns:
+            # Databases from before expiry existed: their rows count as expired
+            self._conn.execute("ALTER TABLE translations ADD COLUMN created REAL NOT NULL DEFAULT 0")
+        if self.ttl:
+            self._conn.execute("DELETE FROM translations WHERE created < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text, source_lang, target_lang, speaker=None, model=None, context=None):
+        """Build the cache key for a text; whitespace differences are ignored.
+
+        context is the preceding line of dialogue, when the text was translated after one.
+        """
+        normalized = " ".join(text.split())
+        parts = [source_lang, target_lang, normalized, speaker or "", model or ""]
+        if context:
+            parts.append(" ".join(context.split()))
+        raw = "\x1f".join(parts)
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, text, source_lang, target_lang, speaker=None, model=None, context=None):
+        """Return the cached translation, or None on a miss or an expired entry"""
+        key = self.make_key(text, source_lang, target_lang, speaker, model, context)
+        oldest = time.time() - self.ttl if self.ttl else 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translated FROM translations WHERE key = ? AND created >= ?", (key, oldest)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, text, source_lang, target_lang, translated, speaker=None, model=None, context=None):
+        """Store a translation"""
+        key = self.make_key(text, source_lang, target_lang, speaker, model, context)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translated, created) VALUES (?, ?, ?)",
+                (key, translated, time.time()),
+            )
+            self._conn.commit()
+
+
+    @staticmethod
+    def make_image_key(image_b64):
+        """Build the OCR cache key for an encoded bubble crop"""
+        return hashlib.blake2b(image_b64.encode('ascii'), digest_size=16).hexdigest()
+
+    def get_ocr_many(self, images_b64):
+        """Return the cached text for each encoded crop, None on a miss"""
+        keys = [self.make_image_key(image_b64) for image_b64 in images_b64]
+        placeholders = ", ".join("?" * len(keys))
+        with self._lock:
+            rows = dict(self._conn.execute(
+                f"SELECT key, text FROM ocr_texts WHERE key IN ({placeholders})", keys
+            ).fetchall())
+        return [rows.get(key) for key in keys]
+
+    def put_ocr_many(self, images_b64, texts):
+        """Store the text read from each encoded crop"""
+        rows = [(self.make_image_key(image_b64), text) for image_b64, text in zip(images_b64, texts)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ocr_texts (key, text) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache():
+    """Return the shared cache, or None when disabled with TRANSLATION_CACHE_PATH="" """
+    global _cache
+    path = os.getenv("TRANSLATION_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            ttl_days = float(os.getenv("TRANSLATION_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS))
+            _cache = TranslationCache(path, ttl_days)
+    return _cache
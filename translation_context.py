@@ -6,6 +6,17 @@ As each bubble is translated, its content is added to the context,
 allowing subsequent translations to be more accurate and consistent.
 """
 
+import json
+# orjson writes and parses long dialogue histories much faster; fall back to the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Capitalized words that start sentences rather than name anyone
+NOT_NAMES = frozenset(['I', 'The', 'A', 'An'])
+NAME_PUNCTUATION = '.,!?"'
+
 class TranslationContext:
     def __init__(self):
         """Initialize empty context"""
@@ -13,6 +24,9 @@ class TranslationContext:
         self.character_names = set()
         self.locations = set()
         self.story_summary = ""
+        # get_context_prompt is rebuilt only after the context changes
+        self._version = 0
+        self._prompt_cache = {}
         
     def add_bubble_to_context(self, bubble_id, original_text, translated_text=None):
         """Add a bubble's text to the context"""
@@ -22,21 +36,24 @@ class TranslationContext:
             'translated': translated_text
         }
         self.context_window.append(context_entry)
+        self._version += 1
         
         # Extract character names (simple heuristic: capitalized words)
-        words = original_text.split()
-        for word in words:
-            # Check if it's a proper noun (capitalized, not at sentence start)
-            if word.strip('.,!?"').isupper() or (len(word) > 1 and word[0].isupper() and word not in ['I', 'The', 'A', 'An']):
-                potential_name = word.strip('.,!?"')
-                if len(potential_name) > 2:  # Avoid short words
-                    self.character_names.add(potential_name)
+        for word in original_text.split():
+            potential_name = word.strip(NAME_PUNCTUATION)
+            # Avoid short words, then check if it's a proper noun (capitalized, not at sentence start)
+            if len(potential_name) > 2 and (potential_name.isupper() or (word[0].isupper() and word not in NOT_NAMES)):
+                self.character_names.add(potential_name)
     
     def get_context_prompt(self, max_previous_bubbles=10):
         """Generate a context prompt for the translation model"""
         if not self.context_window:
             return ""
         
+        cached = self._prompt_cache.get(max_previous_bubbles)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        
         # Get the last N bubbles for context
         recent_context = self.context_window[-max_previous_bubbles:]
         
@@ -54,7 +71,9 @@ class TranslationContext:
                 if entry['translated']:
                     context_parts.append(f"(Translated: {entry['translated']})")
         
-        return "\n".join(context_parts)
+        prompt = "\n".join(context_parts)
+        self._prompt_cache[max_previous_bubbles] = (self._version, prompt)
+        return prompt
     
     def get_full_context(self):
         """Get the complete context for reference"""
@@ -67,18 +86,22 @@ class TranslationContext:
     
     def save_context(self, filepath):
         """Save context to a JSON file"""
-        import json
+        if orjson is not None:
+            # Same layout (2-space indent, raw UTF-8)
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(self.get_full_context(), option=orjson.OPT_INDENT_2))
+            return
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(self.get_full_context(), f, ensure_ascii=False, indent=2)
     
     def load_context(self, filepath):
         """Load context from a JSON file"""
-        import json
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = orjson.loads(f.read()) if orjson is not None else json.load(f)
             self.context_window = data.get('dialogue_history', [])
             self.character_names = set(data.get('characters', []))
             self.story_summary = data.get('summary', '')
+        self._version += 1
     
     def generate_summary(self):
         """Generate a brief summary of the story so far"""
@@ -3,7 +3,7 @@
 Script to extract the last 6 pages from avatar_test.pdf and save as avatar_test_cropped.pdf
 """
 
-import PyPDF2
+import fitz
 import sys
 import os
 
@@ -22,10 +22,9 @@ def crop_last_pages(input_pdf_path, output_pdf_path, num_pages=6):
             print(f"Error: Input file '{input_pdf_path}' not found!")
             return False
         
-        # Open the input PDF
-        with open(input_pdf_path, 'rb') as input_file:
-            pdf_reader = PyPDF2.PdfReader(input_file)
-            total_pages = len(pdf_reader.pages)
+        # Open the input PDF (MuPDF copies pages and their resources in C)
+        with fitz.open(input_pdf_path) as pdf_reader:
+            total_pages = len(pdf_reader)
             
             print(f"Total pages in '{input_pdf_path}': {total_pages}")
             
@@ -37,19 +36,14 @@ def crop_last_pages(input_pdf_path, output_pdf_path, num_pages=6):
                 
             print(f"Extracting pages {start_page + 1} to {total_pages}")
             
-            # Create a PDF writer object
-            pdf_writer = PyPDF2.PdfWriter()
-            
-            # Add the last num_pages to the writer
-            for page_num in range(start_page, total_pages):
-                page = pdf_reader.pages[page_num]
-                pdf_writer.add_page(page)
-            
-            # Write the output PDF
-            with open(output_pdf_path, 'wb') as output_file:
-                pdf_writer.write(output_file)
+            # Copy the last num_pages in one range, without the outline
+            with fitz.open() as pdf_writer:
+                pdf_writer.insert_pdf(pdf_reader, from_page=start_page, to_page=total_pages - 1, links=False)
+                
+                # Write the output PDF, dropping objects only the skipped pages used
+                pdf_writer.save(output_pdf_path, garbage=3, deflate=True)
                 
-            print(f"Successfully created '{output_pdf_path}' with {len(pdf_writer.pages)} pages")
+                print(f"Successfully created '{output_pdf_path}' with {len(pdf_writer)} pages")
             return True
             
     except Exception as e: